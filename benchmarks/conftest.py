@@ -0,0 +1,44 @@
+"""
+Focused tests of the addon's trickier pieces, run outside Kodi on the same
+stubs as the benchmark harness:
+
+    python -m pytest benchmarks
+"""
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [
+    os.path.join(HERE, "stubs"),
+    os.path.join(HERE, "..", "resources"),
+    HERE,
+]
+
+import pytest  # noqa: E402
+import xbmcaddon  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def profile(tmp_path):
+    """
+    A fresh addon_data folder for every test.
+    """
+    xbmcaddon.INFO["profile"] = str(tmp_path) + os.sep
+    return tmp_path
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Frozen time.time(), moved forward with clock.advance(seconds).
+    """
+
+    class Clock:
+        now = 1_000_000.0
+
+        def advance(self, seconds):
+            self.now += seconds
+
+    clock = Clock()
+    monkeypatch.setattr("time.time", lambda: clock.now)
+    return clock
@@ -0,0 +1,412 @@
+"""
+Local stand-in Radarr and Sonarr servers for the benchmark harness.
+
+They implement just enough of the v3 API for the addon's workflows and
+serve payloads shaped and sized like the real thing (full movie resources
+with images and ratings, series lookups with many candidates, seasons and
+alternate titles). Latency, jitter and failures can be injected per server.
+"""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+OVERVIEW = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 12
+
+
+def _images(kind, ident):
+    return [
+        {
+            "coverType": cover,
+            "url": f"/MediaCover/{ident}/{cover}.jpg",
+            "remoteUrl": f"https://image.example.org/{kind}/{ident}/{cover}.jpg",
+        }
+        for cover in ("poster", "fanart", "banner", "clearlogo")
+    ]
+
+
+def make_movie(tmdb_id, movie_id=None, has_file=False):
+    movie = {
+        "tmdbId": tmdb_id,
+        "imdbId": f"tt{tmdb_id:07d}",
+        "title": f"Movie {tmdb_id}",
+        "sortTitle": f"movie {tmdb_id}",
+        "originalTitle": f"Movie {tmdb_id}",
+        "originalLanguage": {"id": 1, "name": "English"},
+        "year": 1990 + tmdb_id % 35,
+        "overview": OVERVIEW,
+        "runtime": 100 + tmdb_id % 60,
+        "studio": "Example Studios",
+        "genres": ["Drama", "Thriller"] if tmdb_id % 2 else ["Animation", "Comedy"],
+        "images": _images("movie", tmdb_id),
+        "ratings": {
+            "imdb": {"votes": 1000 + tmdb_id, "value": 7.1, "type": "user"},
+            "tmdb": {"votes": 500 + tmdb_id, "value": 6.9, "type": "user"},
+        },
+        "alternateTitles": [
+            {"title": f"Movie {tmdb_id} ({lang})", "sourceType": "tmdb"}
+            for lang in ("de", "fr", "es", "it", "ja")
+        ],
+        "hasFile": has_file,
+        "monitored": True,
+        "status": "released",
+    }
+    if movie_id is not None:
+        movie["id"] = movie_id
+        movie["path"] = f"/movies/Movie {tmdb_id}"
+        movie["qualityProfileId"] = 1
+    return movie
+
+
+def make_series(tmdb_id, series_id=None, seasons=8, episodes=24):
+    series = {
+        "tmdbId": tmdb_id,
+        "tvdbId": tmdb_id * 10,
+        "imdbId": f"tt{tmdb_id:07d}",
+        "title": f"Series {tmdb_id}",
+        "sortTitle": f"series {tmdb_id}",
+        "overview": OVERVIEW,
+        "network": "Example TV",
+        "originalLanguage": {"id": 8, "name": "Japanese"} if tmdb_id % 3 == 0 else {"id": 1, "name": "English"},
+        "genres": ["Animation", "Action"] if tmdb_id % 3 == 0 else ["Drama"],
+        "images": _images("series", tmdb_id),
+        "alternateTitles": [
+            {"title": f"Series {tmdb_id} alt {n}", "seasonNumber": -1} for n in range(40)
+        ],
+        "seasons": [
+            {
+                "seasonNumber": n,
+                "monitored": series_id is not None,
+                "images": _images("season", f"{tmdb_id}-{n}"),
+                "statistics": {
+                    "episodeFileCount": episodes // 2,
+                    "episodeCount": episodes,
+                    "totalEpisodeCount": episodes,
+                    "sizeOnDisk": 1000 * n,
+                    "percentOfEpisodes": 50.0,
+                },
+            }
+            for n in range(1, seasons + 1)
+        ],
+        "statistics": {
+            "seasonCount": seasons,
+            "episodeFileCount": seasons * episodes // 2,
+            "episodeCount": seasons * episodes,
+            "totalEpisodeCount": seasons * episodes,
+            "percentOfEpisodes": 50.0,
+        },
+        "monitored": series_id is not None,
+    }
+    if series_id is not None:
+        series["id"] = series_id
+        series["path"] = f"/tv/Series {tmdb_id}"
+    return series
+
+
+def make_episode(series_id, season, number, episodes):
+    return {
+        "id": series_id * 10000 + season * 100 + number,
+        "seriesId": series_id,
+        "seasonNumber": season,
+        "episodeNumber": number,
+        "title": f"Episode {number}",
+        "overview": OVERVIEW,
+        "airDateUtc": "2020-01-01T00:00:00Z",
+        "hasFile": number <= episodes // 2,
+        "monitored": True,
+    }
+
+
+class FakeServer:
+    """
+    Base class: a threaded HTTP server with latency/failure injection and
+    request/byte accounting.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, seed=1, queue_size=0):
+        self.queue_size = queue_size
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._rendered = {}
+        self.reset_stats()
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Avoid Nagle/delayed-ACK stalls skewing keep-alive timings
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self, method):
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                fake._account(method, url.path, length)
+                fake._delay()
+                if fake._fail():
+                    status, data = 503, json.dumps({"message": "injected failure"}).encode("utf-8")
+                else:
+                    status, data = fake.render(method, self.path, url.path, query, body)
+                fake._account_out(len(data))
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def do_PUT(self):
+                self._handle("PUT")
+
+            def do_DELETE(self):
+                self._handle("DELETE")
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def render(self, method, key, path, query, body):
+        """
+        Encode a response, reusing the bytes of identical GETs until the next
+        write. Keeps the server's own allocations out of the client's
+        tracemalloc peak.
+        """
+        if method != "GET":
+            with self._lock:
+                self._rendered.clear()
+        else:
+            with self._lock:
+                cached = self._rendered.get(key)
+            if cached:
+                return cached
+        status, payload = self.route(method, path, query, body)
+        rendered = (status, json.dumps(payload).encode("utf-8"))
+        if method == "GET":
+            with self._lock:
+                self._rendered[key] = rendered
+        return rendered
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests = []
+            self.bytes_in = 0
+            self.bytes_out = 0
+
+    def _account(self, method, path, length):
+        with self._lock:
+            self.requests.append((method, path))
+            self.bytes_in += length
+
+    def _account_out(self, length):
+        with self._lock:
+            self.bytes_out += length
+
+    def _delay(self):
+        with self._lock:
+            delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _fail(self):
+        with self._lock:
+            return self.failure_rate and self._random.random() < self.failure_rate
+
+    def queue_record(self, n, query):
+        size = 4 * 10 ** 9
+        return {
+            "id": n + 1,
+            "title": f"Release.{n}.1080p.WEB-DL",
+            "status": "downloading",
+            "trackedDownloadState": "downloading",
+            "size": size,
+            "sizeleft": size * (n % 10) // 10,
+            "timeleft": f"00:{n % 60:02d}:00",
+            "downloadClient": "Example",
+            "protocol": "torrent",
+        }
+
+    def route(self, method, path, query, body):
+        if path == "/api/v3/qualityprofile":
+            return 200, [{"id": 1, "name": "HD-1080p"}, {"id": 4, "name": "Any"}]
+        if path == "/api/v3/rootfolder":
+            return 200, [{"id": 1, "path": f"/{self.name}", "freeSpace": 10 ** 12}]
+        if path == "/api/v3/queue":
+            page = int(query.get("page", 1))
+            page_size = int(query.get("pageSize", 10))
+            first = (page - 1) * page_size
+            return 200, {
+                "page": page,
+                "pageSize": page_size,
+                "totalRecords": self.queue_size,
+                "records": [
+                    self.queue_record(n, query)
+                    for n in range(first, min(first + page_size, self.queue_size))
+                ],
+            }
+        if path == "/api/v3/queue/details":
+            records = [self.queue_record(n, query) for n in range(self.queue_size)]
+            return 200, [r for r in records if self.queue_matches(r, query)]
+        if path == "/api/v3/command":
+            return 201, {"id": 1, "name": (body or {}).get("name"), "status": "queued"}
+        return 404, {"message": "Not Found"}
+
+
+class FakeRadarr(FakeServer):
+    name = "movies"
+
+    def __init__(self, library_size=10000, **kwargs):
+        super().__init__(**kwargs)
+        # tmdb ids 1..library_size are in the library, every other one has a file
+        self.movies = {
+            tmdb_id: make_movie(tmdb_id, movie_id=tmdb_id, has_file=tmdb_id % 2 == 0)
+            for tmdb_id in range(1, library_size + 1)
+        }
+
+    def route(self, method, path, query, body):
+        if path == "/api/v3/movie" and method == "GET":
+            if "tmdbId" in query:
+                movie = self.movies.get(int(query["tmdbId"]))
+                return 200, [movie] if movie else []
+            return 200, list(self.movies.values())
+        if path == "/api/v3/movie" and method == "POST":
+            if body["tmdbId"] in self.movies:
+                return 409, {"message": "This movie has already been added"}
+            body["id"] = body["tmdbId"]
+            self.movies[body["tmdbId"]] = body
+            return 201, body
+        match = re.match(r"^/api/v3/movie/(\d+)$", path)
+        if match:
+            movie = next((m for m in self.movies.values() if m.get("id") == int(match.group(1))), None)
+            return (200, movie) if movie else (404, {"message": "Not Found"})
+        if path == "/api/v3/movie/import":
+            for movie in body:
+                movie["id"] = movie["tmdbId"]
+                self.movies[movie["tmdbId"]] = movie
+            return 200, body
+        if path == "/api/v3/movie/lookup/tmdb":
+            return 200, make_movie(int(query["tmdbId"]))
+        return super().route(method, path, query, body)
+
+    def queue_matches(self, record, query):
+        return str(record["movieId"]) == query.get("movieId", str(record["movieId"]))
+
+    def queue_record(self, n, query):
+        record = super().queue_record(n, query)
+        record["movieId"] = n + 1
+        if query.get("includeMovie") == "true":
+            record["movie"] = make_movie(n + 1, movie_id=n + 1)
+        return record
+
+
+class FakeSonarr(FakeServer):
+    name = "tv"
+
+    def __init__(self, library_size=500, seasons=8, episodes=24, lookup_candidates=10, **kwargs):
+        super().__init__(**kwargs)
+        self.seasons = seasons
+        self.episodes = episodes
+        self.lookup_candidates = lookup_candidates
+        self.series = {
+            tmdb_id: make_series(tmdb_id, series_id=tmdb_id, seasons=seasons, episodes=episodes)
+            for tmdb_id in range(1, library_size + 1)
+        }
+
+    def route(self, method, path, query, body):
+        if path == "/api/v3/series/lookup":
+            tmdb_id = int(query["term"].split(":", 1)[1])
+            first = self.series.get(tmdb_id) or make_series(tmdb_id, seasons=self.seasons, episodes=self.episodes)
+            others = [
+                make_series(tmdb_id * 1000 + n, seasons=self.seasons, episodes=self.episodes)
+                for n in range(1, self.lookup_candidates)
+            ]
+            return 200, [first] + others
+        if path == "/api/v3/series" and method == "GET":
+            if "tvdbId" in query:
+                return 200, [s for s in self.series.values() if str(s["tvdbId"]) == query["tvdbId"]]
+            return 200, list(self.series.values())
+        if path == "/api/v3/series" and method == "POST":
+            if body["tmdbId"] in self.series:
+                return 409, {"message": "This series has already been added"}
+            body["id"] = body["tmdbId"]
+            self.series[body["tmdbId"]] = body
+            return 201, body
+        match = re.match(r"^/api/v3/series/(\d+)$", path)
+        if match:
+            series = self.series.get(int(match.group(1)))
+            return (200, series) if series else (404, {"message": "Not Found"})
+        if path == "/api/v3/episode" and method == "GET":
+            series_id = int(query["seriesId"])
+            if series_id not in self.series:
+                return 200, []
+            seasons = [int(query["seasonNumber"])] if "seasonNumber" in query else range(1, self.seasons + 1)
+            return 200, [
+                make_episode(series_id, season, n, self.episodes)
+                for season in seasons
+                for n in range(1, self.episodes + 1)
+            ]
+        match = re.match(r"^/api/v3/episode/(\d+)$", path)
+        if match:
+            episode_id = int(match.group(1))
+            series_id, rest = divmod(episode_id, 10000)
+            if series_id not in self.series:
+                return 404, {"message": "Not Found"}
+            return 200, make_episode(series_id, rest // 100, rest % 100, self.episodes)
+        if path == "/api/v3/episode/monitor":
+            return 202, body
+        if path == "/api/v3/seasonpass":
+            for item in body["series"]:
+                series = self.series.get(item["id"])
+                if series:
+                    series["monitored"] = item.get("monitored", series.get("monitored"))
+                    for season in series.get("seasons") or []:
+                        season["monitored"] = True
+            return 202, body
+        return super().route(method, path, query, body)
+
+    def queue_matches(self, record, query):
+        if "seriesId" in query and str(record["seriesId"]) != query["seriesId"]:
+            return False
+        if "episodeIds" in query and str(record["episodeId"]) not in query["episodeIds"].split(","):
+            return False
+        return True
+
+    def queue_record(self, n, query):
+        record = super().queue_record(n, query)
+        series_id = n // self.episodes + 1
+        season, number = 1, n % self.episodes + 1
+        record["seriesId"] = series_id
+        record["episodeId"] = make_episode(series_id, season, number, self.episodes)["id"]
+        if query.get("includeSeries") == "true":
+            record["series"] = make_series(series_id, series_id=series_id, seasons=self.seasons, episodes=self.episodes)
+        if query.get("includeEpisode") == "true":
+            record["episode"] = make_episode(series_id, season, number, self.episodes)
+        return record
@@ -0,0 +1,252 @@
+"""
+Benchmark the addon's request flows end to end against local fake
+Radarr/Sonarr servers.
+
+    python benchmarks/run.py
+    python benchmarks/run.py --latency 0.08 --jitter 0.02 --movies 12000
+    python benchmarks/run.py --flows play_movie,play_episode --modes cold,warm
+
+For every flow and mode it reports wall time (median and p95), backend
+requests and bytes transferred per operation, and peak Python memory.
+
+Modes:
+  cold        empty addon_data before every operation (first ever play)
+  warm        addon_data kept between operations (on-disk caches)
+  library     warm, plus the local library index enabled and synced
+  sequential  cold, with the client's fan-out limited to one worker
+"""
+import argparse
+import itertools
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [
+    os.path.join(HERE, "stubs"),
+    os.path.join(HERE, "..", "resources"),
+    HERE,
+]
+
+import xbmc  # noqa: E402
+import xbmcaddon  # noqa: E402
+import xbmcgui  # noqa: E402
+import xbmcplugin  # noqa: E402
+from fake_servers import FakeRadarr, FakeSonarr  # noqa: E402
+
+MODES = ("cold", "warm", "library", "sequential")
+FLOWS = (
+    "movie_check",
+    "movie_add",
+    "episode_check",
+    "series_check",
+    "series_add",
+    "play_movie",
+    "play_episode",
+)
+
+
+class Harness:
+    def __init__(self, args):
+        self.args = args
+        self.root = tempfile.mkdtemp(prefix="helparr-bench-")
+        self.profile = os.path.join(
+            self.root, "userdata", "addon_data", xbmcaddon.INFO["id"]
+        )
+        xbmcaddon.INFO["profile"] = self.profile + os.sep
+        xbmc.LOG_LEVEL = xbmc.LOGDEBUG if args.verbose else xbmc.LOGFATAL
+
+        server_options = {
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "failure_rate": args.failure_rate,
+        }
+        self.radarr = FakeRadarr(library_size=args.movies, **server_options).start()
+        self.sonarr = FakeSonarr(
+            library_size=args.series,
+            seasons=args.seasons,
+            episodes=args.episodes,
+            **server_options,
+        ).start()
+        # Ids above the library size are not in the library yet
+        self._new_ids = itertools.count(10 ** 6)
+
+        xbmcaddon.SETTINGS.update(
+            {
+                "radarr_url": self.radarr.url,
+                "radarr_key": "bench",
+                "sonarr_url": self.sonarr.url,
+                "sonarr_key": "bench",
+                "pool_size": 4,
+                "connect_timeout": 5,
+                "timeout": 30,
+                "retries": 2,
+                "cache_ttl": 24,
+                "library_refresh": 30,
+            }
+        )
+
+        import client
+        import main
+        import utils
+
+        self.client_module = client
+        self.main = main
+        self.utils = utils
+        self.default_workers = client.MAX_WORKERS
+
+    def close(self):
+        self.radarr.stop()
+        self.sonarr.stop()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    # ----------------------------------------------------------------------
+    # Modes
+    # ----------------------------------------------------------------------
+    def setup_mode(self, mode):
+        shutil.rmtree(self.profile, ignore_errors=True)
+        xbmcaddon.SETTINGS["library_index"] = mode == "library"
+        self.client_module.MAX_WORKERS = 1 if mode == "sequential" else self.default_workers
+        if mode == "library":
+            client = self.utils.build_client()
+            try:
+                client.refresh_library()
+            finally:
+                client.close()
+
+    def before_operation(self, mode):
+        if mode in ("cold", "sequential"):
+            shutil.rmtree(self.profile, ignore_errors=True)
+        else:
+            # Repeat plays would otherwise be answered by the single-flight
+            # memo of the previous one, without running the flow at all
+            shutil.rmtree(self.utils.profile_path("flights"), ignore_errors=True)
+
+    # ----------------------------------------------------------------------
+    # Flows
+    # ----------------------------------------------------------------------
+    def existing_movie(self):
+        return str(self.args.movies // 2 or 1)
+
+    def existing_series(self):
+        return str(self.args.series // 2 or 1)
+
+    def _with_client(self, call):
+        client = self.utils.build_client()
+        try:
+            return call(client)
+        finally:
+            client.close()
+
+    def flow(self, name):
+        if name == "movie_check":
+            return lambda: self._with_client(lambda c: c.request_movie(self.existing_movie()))
+        if name == "movie_add":
+            return lambda: self._with_client(lambda c: c.request_movie(str(next(self._new_ids))))
+        if name == "episode_check":
+            return lambda: self._with_client(
+                lambda c: c.request_series(self.existing_series(), season=1, episode=3)
+            )
+        if name == "series_check":
+            return lambda: self._with_client(lambda c: c.request_series(self.existing_series()))
+        if name == "series_add":
+            return lambda: self._with_client(lambda c: c.request_series(str(next(self._new_ids))))
+        if name == "play_movie":
+            return lambda: self.main.handle_play_request(1, self.existing_movie(), "movie")
+        if name == "play_episode":
+            return lambda: self.main.handle_play_request(
+                1, self.existing_series(), "episode", "1", "3"
+            )
+        raise ValueError(f"Unknown flow: {name}")
+
+    # ----------------------------------------------------------------------
+    # Measurement
+    # ----------------------------------------------------------------------
+    def reset_stats(self):
+        self.radarr.reset_stats()
+        self.sonarr.reset_stats()
+
+    def measure(self, flow_name, mode):
+        self.setup_mode(mode)
+        run = self.flow(flow_name)
+
+        # Warm-up, so warm modes measure a repeat play
+        self.before_operation(mode)
+        run()
+
+        times = []
+        self.reset_stats()
+        for _ in range(self.args.iterations):
+            self.before_operation(mode)
+            started = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - started)
+
+        ops = self.args.iterations
+        requests = len(self.radarr.requests) + len(self.sonarr.requests)
+        transferred = sum(
+            s.bytes_in + s.bytes_out for s in (self.radarr, self.sonarr)
+        )
+
+        # Separate pass for memory; tracemalloc slows everything down
+        self.before_operation(mode)
+        tracemalloc.start()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        times.sort()
+        return {
+            "flow": flow_name,
+            "mode": mode,
+            "median_ms": statistics.median(times) * 1000,
+            "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))] * 1000,
+            "requests": requests / ops,
+            "kb": transferred / ops / 1024,
+            "peak_kb": peak / 1024,
+        }
+
+
+def print_table(rows):
+    header = ("flow", "mode", "median ms", "p95 ms", "req/op", "KB/op", "peak KB")
+    print("{:<15} {:<11} {:>10} {:>10} {:>8} {:>10} {:>10}".format(*header))
+    for row in rows:
+        print(
+            "{flow:<15} {mode:<11} {median_ms:>10.1f} {p95_ms:>10.1f} "
+            "{requests:>8.1f} {kb:>10.1f} {peak_kb:>10.1f}".format(**row)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--flows", default=",".join(FLOWS))
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.005, help="+/- seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="0..1, served as 503")
+    parser.add_argument("--movies", type=int, default=10000, help="Radarr library size")
+    parser.add_argument("--series", type=int, default=500, help="Sonarr library size")
+    parser.add_argument("--seasons", type=int, default=8)
+    parser.add_argument("--episodes", type=int, default=24, help="per season")
+    parser.add_argument("--verbose", action="store_true", help="show addon log output")
+    args = parser.parse_args()
+
+    harness = Harness(args)
+    try:
+        rows = [
+            harness.measure(flow, mode)
+            for flow in args.flows.split(",")
+            for mode in args.modes.split(",")
+        ]
+    finally:
+        harness.close()
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
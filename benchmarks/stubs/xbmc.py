@@ -0,0 +1,74 @@
+"""
+Minimal stand-in for Kodi's xbmc module, enough to import and run the addon
+outside Kodi.
+"""
+import json
+import threading
+
+LOGDEBUG = 0
+LOGINFO = 1
+LOGWARNING = 2
+LOGERROR = 3
+LOGFATAL = 4
+
+# Lowest level written to stdout; raise to silence the addon during runs.
+LOG_LEVEL = LOGWARNING
+_abort = threading.Event()
+
+
+def log(msg, level=LOGDEBUG):
+    if level >= LOG_LEVEL:
+        print(msg)
+
+
+def getInfoLabel(label):
+    return ""
+
+
+def getCondVisibility(condition):
+    return False
+
+
+def executebuiltin(function, wait=False):
+    pass
+
+
+# Results returned by executeJSONRPC, by method name
+JSONRPC_RESULTS = {}
+
+
+def executeJSONRPC(request):
+    method = json.loads(request).get("method")
+    return json.dumps({"id": 1, "jsonrpc": "2.0", "result": JSONRPC_RESULTS.get(method, {})})
+
+
+def sleep(ms):
+    _abort.wait(ms / 1000.0)
+
+
+class Monitor:
+    def abortRequested(self):
+        return _abort.is_set()
+
+    def waitForAbort(self, timeout=None):
+        return _abort.wait(timeout)
+
+
+class Player:
+    # Path of the file "playing" in every Player, for runs that need one
+    PLAYING = ""
+
+    def isPlaying(self):
+        return bool(Player.PLAYING)
+
+    def isPlayingVideo(self):
+        return bool(Player.PLAYING)
+
+    def getPlayingFile(self):
+        return Player.PLAYING
+
+    def play(self, item=None, listitem=None):
+        pass
+
+    def stop(self):
+        Player.PLAYING = ""
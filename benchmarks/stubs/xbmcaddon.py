@@ -0,0 +1,49 @@
+"""
+Minimal stand-in for Kodi's xbmcaddon module. Settings and addon info are
+plain dictionaries the harness fills in before importing the addon.
+"""
+import os
+
+ADDON_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+INFO = {
+    "id": "plugin.video.themoviedb.download",
+    "name": "TMDb Download Helparr",
+    "path": ADDON_DIR,
+    "profile": "",
+    "icon": os.path.join(ADDON_DIR, "resources", "images", "icon.jpg"),
+    "version": "0.0.0",
+}
+SETTINGS = {}
+
+
+class Addon:
+    def __init__(self, id=None):
+        pass
+
+    def getAddonInfo(self, key):
+        return INFO.get(key, "")
+
+    def getSetting(self, key):
+        value = SETTINGS.get(key, "")
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        return str(value)
+
+    def getSettingBool(self, key):
+        return bool(SETTINGS.get(key, False))
+
+    def getSettingInt(self, key):
+        return int(SETTINGS.get(key, 0) or 0)
+
+    def getSettingString(self, key):
+        return str(SETTINGS.get(key, ""))
+
+    def setSetting(self, key, value):
+        SETTINGS[key] = value
+
+    def openSettings(self):
+        pass
+
+    def getLocalizedString(self, string_id):
+        return str(string_id)
@@ -0,0 +1,101 @@
+"""
+Minimal stand-in for Kodi's xbmcgui module.
+"""
+
+NOTIFICATION_INFO = "info"
+NOTIFICATION_WARNING = "warning"
+NOTIFICATION_ERROR = "error"
+
+# Every notification shown, as (header, message) tuples.
+NOTIFICATIONS = []
+
+
+class Dialog:
+    def notification(self, heading, message, icon=NOTIFICATION_INFO, time=5000, sound=True):
+        NOTIFICATIONS.append((heading, message))
+
+    def ok(self, heading, message):
+        return True
+
+    def yesno(self, heading, message, *args, **kwargs):
+        return False
+
+    def select(self, heading, options, *args, **kwargs):
+        return -1
+
+    def textviewer(self, heading, text, *args, **kwargs):
+        pass
+
+    def browse(self, *args, **kwargs):
+        return ""
+
+
+class DialogProgressBG:
+    def create(self, heading, message=""):
+        pass
+
+    def update(self, percent=0, heading=None, message=None):
+        pass
+
+    def close(self):
+        pass
+
+
+class _InfoTag:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class ListItem:
+    def __init__(self, label="", label2="", path="", offscreen=False):
+        self.label = label
+        self.label2 = label2
+        self.path = path
+        self.art = {}
+        self.properties = {}
+
+    def getLabel(self):
+        return self.label
+
+    def setLabel(self, label):
+        self.label = label
+
+    def setLabel2(self, label):
+        self.label2 = label
+
+    def setPath(self, path):
+        self.path = path
+
+    def setArt(self, art):
+        self.art.update(art)
+
+    def setProperty(self, key, value):
+        self.properties[key] = value
+
+    def setProperties(self, values):
+        self.properties.update(values)
+
+    def getVideoInfoTag(self):
+        return _InfoTag()
+
+    def setInfo(self, type, info):
+        pass
+
+    def addContextMenuItems(self, items, replaceItems=False):
+        pass
+
+
+class Window:
+    _properties = {}
+
+    def __init__(self, window_id=-1):
+        self._id = window_id
+
+    def getProperty(self, key):
+        return Window._properties.get((self._id, key), "")
+
+    def setProperty(self, key, value):
+        Window._properties[(self._id, key)] = value
+
+    def clearProperty(self, key):
+        Window._properties.pop((self._id, key), None)
@@ -0,0 +1,40 @@
+"""
+Minimal stand-in for Kodi's xbmcplugin module. Resolved URLs and directory
+items are recorded so the harness can check what the addon did.
+"""
+
+RESOLVED = []
+DIRECTORY = []
+
+SORT_METHOD_NONE = 0
+SORT_METHOD_LABEL = 1
+
+
+def setResolvedUrl(handle, succeeded, listitem):
+    RESOLVED.append((succeeded, listitem.path))
+
+
+def addDirectoryItem(handle, url, listitem, isFolder=False, totalItems=0):
+    DIRECTORY.append((url, listitem, isFolder))
+    return True
+
+
+def addDirectoryItems(handle, items, totalItems=0):
+    DIRECTORY.extend(items)
+    return True
+
+
+def endOfDirectory(handle, succeeded=True, updateListing=False, cacheToDisc=True):
+    pass
+
+
+def setContent(handle, content):
+    pass
+
+
+def setPluginCategory(handle, category):
+    pass
+
+
+def addSortMethod(handle, sortMethod, labelMask="", label2Mask=""):
+    pass
@@ -0,0 +1,53 @@
+"""
+Minimal stand-in for Kodi's xbmcvfs module, mapping special:// paths onto
+the harness' temporary profile directory.
+"""
+import os
+
+import xbmcaddon
+
+
+def translatePath(path):
+    if path.startswith("special://profile/"):
+        root = os.path.dirname(xbmcaddon.INFO["profile"].rstrip(os.sep))
+        root = os.path.dirname(root)
+        return os.path.join(root, path[len("special://profile/"):])
+    return path
+
+
+def exists(path):
+    return os.path.exists(path)
+
+
+def mkdirs(path):
+    os.makedirs(path, exist_ok=True)
+    return True
+
+
+def delete(path):
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
+
+
+class File:
+    def __init__(self, path, mode="r"):
+        self._f = open(path, "w" if mode == "w" else "r", encoding="utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._f.close()
+
+    def read(self):
+        return self._f.read()
+
+    def write(self, content):
+        self._f.write(content)
+        return True
+
+    def close(self):
+        self._f.close()
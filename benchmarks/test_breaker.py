@@ -0,0 +1,67 @@
+import pytest
+from breaker import CircuitBreaker
+from cache import DiskCache
+
+HOST = "http://sonarr:8989"
+
+
+@pytest.fixture
+def store(profile):
+    return DiskCache(str(profile / "breaker.json"), ttl=0)
+
+
+def open_circuit(breaker, threshold):
+    for _ in range(threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_opens_after_threshold_failures(store, clock):
+    breaker = CircuitBreaker(store, HOST, threshold=3, cooldown=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.retry_in() == 30
+
+
+def test_success_resets_the_failure_count(store, clock):
+    breaker = CircuitBreaker(store, HOST, threshold=3, cooldown=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_half_open_trial_success_closes(store, clock):
+    breaker = CircuitBreaker(store, HOST, threshold=3, cooldown=30)
+    open_circuit(breaker, 3)
+    clock.advance(29)
+    assert breaker.state == "open"
+    clock.advance(1)
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_half_open_trial_failure_reopens_for_a_full_cooldown(store, clock):
+    breaker = CircuitBreaker(store, HOST, threshold=3, cooldown=30)
+    open_circuit(breaker, 3)
+    clock.advance(30)
+    assert breaker.state == "half-open"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.retry_in() == 30
+
+
+def test_state_is_shared_through_the_store(store, clock):
+    open_circuit(CircuitBreaker(store, HOST, threshold=3, cooldown=30), 3)
+    # Another plugin invocation reading the same file
+    other = DiskCache(store.path, ttl=0)
+    assert not CircuitBreaker(other, HOST, threshold=3, cooldown=30).allow()
+    assert CircuitBreaker(other, "http://radarr:7878", threshold=3, cooldown=30).allow()
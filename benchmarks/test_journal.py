@@ -0,0 +1,112 @@
+import journal as journal_module
+import pytest
+from journal import BACKOFF_BASE, BACKOFF_MAX, DONE, FAILED, MAX_ATTEMPTS, PENDING, Journal, drain
+
+
+@pytest.fixture
+def journal(profile):
+    journal = Journal(str(profile / "journal.db"))
+    yield journal
+    journal.close()
+
+
+def entry(journal):
+    (only,) = journal.entries()
+    return only
+
+
+def test_enqueue_is_idempotent_while_waiting(journal, clock):
+    params = {"tmdb_id": 1, "season": 2, "episode": 3}
+    assert journal.enqueue("request_series", params)
+    assert not journal.enqueue("request_series", dict(params))
+    assert len(journal.entries()) == 1
+
+
+def test_delayed_entry_is_not_claimed_early(journal, clock):
+    journal.enqueue("search_series", {"tmdb_id": 1}, delay=600)
+    assert journal.claim() == []
+    assert journal.next_due() == pytest.approx(600)
+    clock.advance(600)
+    assert [e["method"] for e in journal.claim()] == ["search_series"]
+
+
+def test_backoff_doubles_up_to_the_cap(journal, clock):
+    journal.enqueue("request_movie", {"tmdb_id": 1})
+    for attempt in range(1, MAX_ATTEMPTS):
+        (claimed,) = journal.claim()
+        assert journal.fail(claimed["key"], "down")
+        delay = entry(journal)["next_attempt"] - clock.now
+        expected = min(BACKOFF_BASE * 2 ** (attempt - 1), BACKOFF_MAX)
+        assert expected * 0.8 <= delay <= expected * 1.2
+        assert entry(journal)["status"] == PENDING
+        # Not due again before the backoff ends
+        assert journal.claim() == []
+        clock.advance(delay)
+
+    (claimed,) = journal.claim()
+    assert not journal.fail(claimed["key"], "still down")
+    assert entry(journal)["status"] == FAILED
+    assert entry(journal)["attempts"] == MAX_ATTEMPTS
+
+
+def test_retry_failed_resets_attempts(journal, clock):
+    journal.enqueue("request_movie", {"tmdb_id": 1})
+    for _ in range(MAX_ATTEMPTS):
+        clock.advance(BACKOFF_MAX * 2)
+        (claimed,) = journal.claim()
+        journal.fail(claimed["key"], "down")
+    assert journal.retry_failed() == 1
+    assert entry(journal)["attempts"] == 0
+    assert len(journal.claim()) == 1
+
+
+def test_abandoned_claim_is_taken_again_after_the_lease(journal, clock):
+    journal.enqueue("request_movie", {"tmdb_id": 1})
+    assert len(journal.claim()) == 1
+    assert journal.claim() == []
+    clock.advance(journal_module.LEASE + 1)
+    assert len(journal.claim()) == 1
+
+
+class Client:
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    def request_series(self, **params):
+        self.calls.append(("request_series", params))
+        return self.results.pop(0)
+
+    def search_episodes(self, **params):
+        self.calls.append(("search_episodes", params))
+        return {"status": "requested", "pending_series_search": True}
+
+
+def test_drain_retries_errors_and_queues_follow_up_searches(journal, clock):
+    params = {"tmdb_id": 1, "season": 2, "episode": 3}
+    journal.enqueue("request_series", params)
+    client = Client(
+        [
+            {"status": "error", "message": "down"},
+            {"status": "requested", "data": {"title": "Show"}, "pending_search": [[2, 3]]},
+        ]
+    )
+    finished = []
+
+    assert drain(journal, client, on_result=lambda e, r: finished.append(e["method"])) == 1
+    assert finished == []
+    assert entry(journal)["status"] == PENDING
+
+    clock.advance(BACKOFF_BASE * 1.2)
+    drain(journal, client, on_result=lambda e, r: finished.append(e["method"]))
+    # The episode search queued by the request ran in the same drain; the
+    # series search waits for its delay
+    assert finished == ["request_series", "search_episodes"]
+    assert client.calls[-1] == ("search_episodes", {"tmdb_id": 1, "episodes": [[2, 3]]})
+    statuses = {e["method"]: e["status"] for e in journal.entries()}
+    assert statuses == {
+        "request_series": DONE,
+        "search_episodes": DONE,
+        "search_series": PENDING,
+    }
+    assert journal.next_due() == pytest.approx(journal_module.SERIES_SEARCH_DELAY)
@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+
+import pytest
+from singleflight import SingleFlight
+
+
+@pytest.fixture
+def folder(profile):
+    return str(profile / "flights")
+
+
+class Counter:
+    def __init__(self, result="done", delay=0):
+        self.result = result
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return {"status": self.result, "call": self.calls}
+
+
+def test_result_is_reused_within_the_memo_ttl(folder, clock):
+    flights = SingleFlight(folder, memo_ttl=5)
+    fn = Counter()
+    assert flights.do("movie:1", fn) == {"status": "done", "call": 1}
+    clock.advance(5)
+    assert flights.do("movie:1", fn)["call"] == 1
+    clock.advance(1)
+    assert flights.do("movie:1", fn)["call"] == 2
+    # Other keys never share results
+    assert flights.do("movie:2", fn)["call"] == 3
+
+
+def test_exceptions_are_not_shared(folder):
+    flights = SingleFlight(folder)
+
+    def fail():
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError):
+        flights.do("movie:1", fail)
+    # The lock was released and nothing was memoized
+    assert flights.do("movie:1", Counter())["call"] == 1
+
+
+def test_concurrent_callers_share_one_call(folder):
+    flights = SingleFlight(folder)
+    fn = Counter(delay=0.3)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(flights.do("movie:1", fn)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join()
+    assert fn.calls == 1
+    assert results == [{"status": "done", "call": 1}] * 4
+
+
+def test_stale_lock_of_a_dead_owner_is_taken_over(folder):
+    flights = SingleFlight(folder, lease=1)
+    lock_path, _ = flights._paths("movie:1")
+    with open(lock_path, "w") as f:
+        f.write("12345")
+    stale = time.time() - 2
+    os.utime(lock_path, (stale, stale))
+
+    started = time.time()
+    assert flights.do("movie:1", Counter())["call"] == 1
+    assert time.time() - started < 0.5
+    assert not os.path.exists(lock_path)
+
+
+def test_waiter_runs_the_call_itself_after_the_lease(folder):
+    flights = SingleFlight(folder, lease=0.3)
+    lock_path, _ = flights._paths("movie:1")
+    # An owner that never finishes
+    open(lock_path, "w").close()
+
+    started = time.time()
+    assert flights.do("movie:1", Counter())["call"] == 1
+    assert 0.3 <= time.time() - started < 1
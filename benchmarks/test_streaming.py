@@ -0,0 +1,57 @@
+import json
+
+import pytest
+from models import first_item, iter_array
+
+
+class Response:
+    """
+    Stands in for a streamed requests response, cut into fixed-size chunks.
+    """
+
+    def __init__(self, body, chunk):
+        self.body = body
+        self.chunk = chunk
+        self.read = 0
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), self.chunk):
+            self.read = start + self.chunk
+            yield self.body[start : start + self.chunk]
+
+
+BODY = (
+    '[12, 345, true, null, "a\\"b]", {"a": [1, "]"], "b": {}}, '
+    '-1.5e3 , [2] ,"é漢", 0]'
+).encode("utf-8")
+
+
+@pytest.mark.parametrize("chunk", range(1, len(BODY) + 1))
+def test_items_split_across_chunks(chunk):
+    assert list(iter_array(Response(BODY, chunk))) == json.loads(BODY)
+
+
+def test_scalar_cut_by_chunk_boundary_is_not_decoded_early():
+    assert list(iter_array(Response(b"[12, 345]", 2))) == [12, 345]
+
+
+def test_empty_array():
+    assert list(iter_array(Response(b" [ ] ", 1))) == []
+
+
+def test_truncated_array():
+    with pytest.raises(ValueError):
+        list(iter_array(Response(b'[{"a": 1}, 2', 4)))
+
+
+def test_not_an_array():
+    with pytest.raises(ValueError):
+        list(iter_array(Response(b'{"a": 1}', 4)))
+
+
+def test_first_item_drains_the_rest():
+    body = json.dumps([{"id": n} for n in range(1000)]).encode("utf-8")
+    response = Response(body, 64)
+    assert first_item(response) == {"id": 0}
+    assert response.read >= len(body)
+    assert first_item(Response(b"[]", 64)) is None
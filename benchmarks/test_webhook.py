@@ -0,0 +1,52 @@
+import base64
+import http.client
+import json
+import time
+
+import pytest
+from webhook import WebhookServer
+
+
+@pytest.fixture
+def receiver():
+    events = []
+    server = WebhookServer(events.append, port=0, password="pässwörd")
+    server.start()
+    yield server, events
+    server.stop()
+
+
+def post(server, password=None):
+    headers = {"Content-Type": "application/json"}
+    if password is not None:
+        token = base64.b64encode(f"radarr:{password}".encode("utf-8")).decode("ascii")
+        headers["Authorization"] = f"Basic {token}"
+    conn = http.client.HTTPConnection("127.0.0.1", server._server.server_address[1], timeout=5)
+    try:
+        conn.request("POST", "/", json.dumps({"eventType": "Test"}), headers)
+        return conn.getresponse().status
+    finally:
+        conn.close()
+
+
+def test_password_is_required():
+    with pytest.raises(ValueError):
+        WebhookServer(lambda event: None, port=0, password="")
+
+
+def test_events_need_the_password(receiver):
+    server, events = receiver
+    assert post(server) == 401
+    assert post(server, "wrong") == 401
+    assert post(server, "pässwörd") == 200
+    # Handled after the reply
+    deadline = time.time() + 5
+    while not events and time.time() < deadline:
+        time.sleep(0.01)
+    assert events == [{"eventType": "Test"}]
+
+
+def test_non_ascii_guess_is_refused(receiver):
+    server, events = receiver
+    assert post(server, "wröng") == 401
+    assert events == []
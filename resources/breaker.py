@@ -0,0 +1,66 @@
+import time
+
+import xbmc
+from utils import log
+
+# Consecutive failed calls before a host's circuit opens, and how long it
+# stays open before a single trial call is let through (half-open).
+FAILURE_THRESHOLD = 3
+COOLDOWN = 30
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker whose state lives in a shared DiskCache, so a
+    dead host detected by one plugin invocation makes the next one fail fast
+    instead of waiting on the same timeouts again.
+
+    closed:    failures < threshold, calls go through
+    open:      threshold reached, calls are refused until the cooldown ends
+    half-open: cooldown over, calls go through; the first success closes the
+               circuit and the first failure re-opens it
+    """
+
+    def __init__(self, store, host, threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN):
+        self._store = store
+        self._host = host
+        self._threshold = threshold
+        self._cooldown = cooldown
+
+    def _state(self):
+        return self._store.get(self._host, ttl=0) or {"failures": 0, "opened": 0}
+
+    @property
+    def state(self):
+        state = self._state()
+        if state["failures"] < self._threshold:
+            return "closed"
+        if time.time() - state["opened"] < self._cooldown:
+            return "open"
+        return "half-open"
+
+    def retry_in(self):
+        """
+        Seconds until an open circuit lets a trial call through.
+        """
+        state = self._state()
+        return max(0, int(state["opened"] + self._cooldown - time.time()))
+
+    def allow(self):
+        return self.state != "open"
+
+    def record_success(self):
+        if self._state()["failures"]:
+            if self.state != "closed":
+                log(f"Circuit closed for {self._host}", xbmc.LOGINFO)
+            self._store.delete(self._host)
+
+    def record_failure(self):
+        state = self._state()
+        state["failures"] += 1
+        if state["failures"] >= self._threshold:
+            # Opening, or re-opening after a failed half-open trial
+            if state["failures"] == self._threshold or self.state == "half-open":
+                log(f"Circuit opened for {self._host}", xbmc.LOGWARNING)
+            state["opened"] = time.time()
+        self._store.set(self._host, state)
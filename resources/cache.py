@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+import time
+
+import xbmc
+from utils import log
+
+DEFAULT_TTL = 24 * 60 * 60
+SIGNATURE_KEY = "__signature__"
+
+
+class DiskCache:
+    """
+    Small JSON file backed key/value store with per-entry expiry.
+
+    The plugin runs as a fresh interpreter on every invocation, so anything
+    worth caching between plays has to live on disk. Entries are stored as
+    {"t": <timestamp>, "v": <value>} and written through on every change.
+    Long-lived instances (the background service) reload the file when
+    another process has rewritten it. Writes drop entries older than ttl,
+    and with max_entries the oldest entries beyond that count, so the file
+    that every access parses stays small.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, max_entries=None):
+        self._path = path
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._data = None
+        self._mtime = None
+        self._lock = threading.RLock()
+
+    @property
+    def path(self):
+        return self._path
+
+    def _stat(self):
+        try:
+            return os.stat(self._path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _load(self):
+        mtime = self._stat()
+        if self._data is not None and mtime == self._mtime:
+            return self._data
+        self._data = {}
+        self._mtime = mtime
+        if mtime is not None:
+            try:
+                with open(self._path, "r", encoding="utf-8") as f:
+                    self._data = json.load(f)
+            except Exception as e:
+                log(f"Discarding unreadable cache {self._path}: {e}", xbmc.LOGWARNING)
+        return self._data
+
+    def _save(self):
+        folder = os.path.dirname(self._path)
+        tmp_path = f"{self._path}.{os.getpid()}.tmp"
+        try:
+            if folder and not os.path.isdir(folder):
+                os.makedirs(folder, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, separators=(",", ":"))
+            os.replace(tmp_path, self._path)
+            self._mtime = self._stat()
+        except Exception as e:
+            log(f"Error writing cache {self._path}: {e}", xbmc.LOGERROR)
+
+    def get(self, key, ttl=None):
+        """
+        Return the cached value for key, or None if missing or expired.
+        """
+        ttl = self._ttl if ttl is None else ttl
+        with self._lock:
+            entry = self._load().get(key)
+        if not entry:
+            return None
+        if ttl and time.time() - entry["t"] > ttl:
+            return None
+        return entry["v"]
+
+    def set(self, key, value):
+        with self._lock:
+            data = self._load()
+            now = time.time()
+            data[key] = {"t": now, "v": value}
+            keys = [k for k in data if k != SIGNATURE_KEY]
+            if self._ttl:
+                expired = [k for k in keys if now - data[k]["t"] > self._ttl]
+                for k in expired:
+                    del data[k]
+                if expired:
+                    keys = [k for k in keys if k in data]
+            if self._max_entries and len(keys) > self._max_entries:
+                keys.sort(key=lambda k: data[k]["t"])
+                for k in keys[: len(keys) - self._max_entries]:
+                    del data[k]
+            self._save()
+
+    def delete(self, key):
+        with self._lock:
+            if self._load().pop(key, None) is not None:
+                self._save()
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            data = self._load()
+            keys = [k for k in data if k.startswith(prefix)]
+            for k in keys:
+                del data[k]
+            if keys:
+                self._save()
+
+    def clear(self):
+        with self._lock:
+            signature = self._load().get(SIGNATURE_KEY)
+            self._data = {}
+            if signature:
+                self._data[SIGNATURE_KEY] = signature
+            self._save()
+
+    def validate(self, signature):
+        """
+        Drop every entry if the cache was filled under a different signature
+        (e.g. the backend hosts or API keys changed in settings).
+        """
+        with self._lock:
+            entry = self._load().get(SIGNATURE_KEY)
+            if entry and entry["v"] == signature:
+                return
+            if entry:
+                log("Settings changed, clearing cache.", xbmc.LOGDEBUG)
+            self._data = {SIGNATURE_KEY: {"t": time.time(), "v": signature}}
+            self._save()
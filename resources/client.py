@@ -1,116 +1,680 @@
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+
 import requests
+from requests.adapters import HTTPAdapter
 import xbmc
+import stats
+from breaker import CircuitBreaker
+from models import Episode, Movie, QueueItem, Series, first_item, iter_array
 from utils import log
 
 ENABLE_REQUESTS = True
 
+# Connection pool defaults. Each backend host gets its own keep-alive pool so
+# consecutive calls in a workflow reuse one TCP/TLS connection.
+DEFAULT_POOL_SIZE = 4
+# Either a single number or a (connect, read) tuple, as accepted by requests.
+DEFAULT_TIMEOUT = (5, 10)
+DEFAULT_HEADERS = {
+    "Accept": "application/json",
+    "User-Agent": "kodi-helparr",
+}
+# Idempotent requests are retried this many times on connection errors,
+# timeouts and 502/503/504, sleeping RETRY_BACKOFF * 2^attempt seconds with
+# +/- 50% jitter in between.
+DEFAULT_RETRIES = 2
+RETRY_BACKOFF = 0.5
+RETRY_METHODS = ("GET", "HEAD")
+RETRY_STATUSES = (502, 503, 504)
+# Independent lookups within one workflow (metadata lookup, quality profile,
+# root folder) are fanned out over a small bounded thread pool.
+MAX_WORKERS = 3
+
+# Cached per-season episode indexes are refreshed when the season statistics
+# reported by Sonarr change, and at the latest after this many seconds.
+EPISODE_INDEX_TTL = 60 * 60
+# The local library index only answers existence checks while its last sync
+# is younger than this; older indexes fall back to the network.
+LIBRARY_MAX_AGE = 24 * 60 * 60
+# Series prefetched ahead of autoplay-next answer episode requests for this
+# long, after which the next request checks Sonarr again.
+PREFETCH_TTL = 10 * 60
+PREFETCH_EPISODES = 3
+# Download queue pages are fetched on demand and reused for this long, so
+# paging back and forth does not hit the servers again.
+QUEUE_PAGE_SIZE = 50
+QUEUE_TTL = 30
+# Radarr/Sonarr lookups go out to their remote metadata services, the
+# slowest step of a request. Their payloads are reused for this long (an
+# existence check followed by an add needs the same one twice), while
+# TMDb -> TVDB and TMDb -> series id mappings, which practically never
+# change, are kept for much longer.
+LOOKUP_TTL = 60 * 60
+ID_TTL = 30 * 24 * 60 * 60
+# Only candidates that are not in the library yet are reused, trimmed to
+# what an add payload and the routing rules need.
+MOVIE_LOOKUP_FIELDS = (
+    "tmdbId",
+    "imdbId",
+    "title",
+    "titleSlug",
+    "year",
+    "images",
+    "genres",
+    "originalLanguage",
+)
+SERIES_LOOKUP_FIELDS = (
+    "tvdbId",
+    "tmdbId",
+    "imdbId",
+    "title",
+    "titleSlug",
+    "year",
+    "images",
+    "seasons",
+    "seriesType",
+    "genres",
+    "originalLanguage",
+)
+# After adding a series for a single episode, Sonarr needs a moment to fetch
+# its episode list before the episode can be searched. It is polled this
+# often, for at most this many seconds, before searching the whole season
+# instead.
+EPISODE_POLL_INTERVAL = 2
+EPISODE_WAIT = 15
+
+
+class BackendError(Exception):
+    pass
+
+
+class BackendUnavailable(BackendError):
+    """
+    The host is not responding, or its circuit breaker is open.
+    """
+
+
+class AlreadyAdded(BackendError):
+    """
+    The server rejected an add because the title is already in its library.
+    """
+
+    def __init__(self, message, data=None):
+        super().__init__(message)
+        self.data = data
+
+
+class Route:
+    """
+    Routing rules of one instance: the quality profile new titles get, and
+    the genres and original languages it accepts. An instance without
+    genres or languages accepts everything.
+    """
+
+    def __init__(self, profile=None, genres="", languages=""):
+        self.profile = profile or None
+        self.genres = _split(genres)
+        self.languages = _split(languages)
+
+    @property
+    def specific(self):
+        return bool(self.genres or self.languages)
+
+    def matches(self, item):
+        """
+        Check a lookup result against the rules. Sonarr's series type
+        (e.g. "anime") counts as a genre.
+        """
+        if self.genres:
+            genres = {g.lower() for g in item.get("genres") or []}
+            if item.get("seriesType"):
+                genres.add(item["seriesType"].lower())
+            if not self.genres & genres:
+                return False
+        if self.languages:
+            language = item.get("originalLanguage") or {}
+            if isinstance(language, dict):
+                language = language.get("name")
+            if (language or "").lower() not in self.languages:
+                return False
+        return True
+
+
+class Backend:
+    """
+    A single Radarr/Sonarr host with its own pooled keep-alive session,
+    retry policy, routing rules and optional circuit breaker.
+    """
+
+    def __init__(
+        self,
+        name,
+        host,
+        apikey,
+        pool_size=DEFAULT_POOL_SIZE,
+        timeout=DEFAULT_TIMEOUT,
+        headers=None,
+        retries=DEFAULT_RETRIES,
+        breaker_store=None,
+        route=None,
+    ):
+        if not host.startswith("http"):
+            host = "http://" + host
+        self.name = name
+        self.host = host.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.route = route or Route()
+        self.breaker = CircuitBreaker(breaker_store, self.host) if breaker_store else None
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        if headers:
+            self.session.headers.update(headers)
+        self.session.headers["X-Api-Key"] = apikey
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def url(self, path):
+        return f"{self.host}{path}"
+
+    @property
+    def available(self):
+        """
+        False while the host's circuit is open.
+        """
+        return self.breaker is None or self.breaker.allow()
+
+    def request(self, method, path, **kwargs):
+        """
+        Send a request, retrying idempotent ones on transient failures.
+        Raises BackendUnavailable when the host cannot be reached or its
+        circuit is open.
+        """
+        if self.breaker and not self.breaker.allow():
+            stats.incr(f"{self.name} circuit open")
+            raise BackendUnavailable(
+                f"{self.name} is not responding, retrying in {self.breaker.retry_in()}s."
+            )
+
+        kwargs.setdefault("timeout", self.timeout)
+        name = f"{self.name} {method} {_endpoint(path)}" if stats.enabled() else None
+        attempts = 1 + (self.retries if method in RETRY_METHODS else 0)
+        for attempt in range(attempts):
+            if attempt:
+                stats.incr(f"{self.name} retries")
+                time.sleep(RETRY_BACKOFF * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+            started = time.perf_counter()
+            try:
+                r = self.session.request(method, self.url(path), **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                stats.record(name, time.perf_counter() - started, error=True)
+                error = e
+                continue
+            stats.record(name, time.perf_counter() - started, error=r.status_code >= 400)
+            if r.status_code in RETRY_STATUSES and attempt + 1 < attempts:
+                continue
+            break
+        else:
+            if self.breaker:
+                self.breaker.record_failure()
+            log(f"{self.name} request to {path} failed: {error}", xbmc.LOGWARNING)
+            raise BackendUnavailable(f"{self.name} is not responding.") from error
+
+        if self.breaker:
+            if r.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+        return r
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def close(self):
+        self.session.close()
+
 
 class MediaClient:
-    def __init__(self, radarr_host, radarr_apikey, sonarr_host, sonarr_apikey):
-        self._radarr_host = radarr_host
-        if not self._radarr_host.startswith("http"):
-            self._radarr_host = "http://" + self._radarr_host
+    """
+    Radarr/Sonarr request workflows over one or more instances of each.
+    The positional host and API key are the primary instance; further ones
+    are passed as lists of Backend keyword arguments (name, host, apikey,
+    route).
+    """
 
-        self._radarr_apikey = radarr_apikey
+    def __init__(
+        self,
+        radarr_host,
+        radarr_apikey,
+        sonarr_host,
+        sonarr_apikey,
+        pool_size=DEFAULT_POOL_SIZE,
+        timeout=DEFAULT_TIMEOUT,
+        headers=None,
+        cache=None,
+        episode_cache=None,
+        library=None,
+        retries=DEFAULT_RETRIES,
+        breaker_store=None,
+        radarr_route=None,
+        sonarr_route=None,
+        radarr_instances=(),
+        sonarr_instances=(),
+        prefetch_cache=None,
+        queue_cache=None,
+        targeted_search=False,
+        id_cache=None,
+        lookup_cache=None,
+    ):
+        options = {
+            "pool_size": pool_size,
+            "timeout": timeout,
+            "headers": headers,
+            "retries": retries,
+            "breaker_store": breaker_store,
+        }
+        self._radarrs = [
+            Backend("Radarr", radarr_host, radarr_apikey, route=radarr_route, **options)
+        ] + [Backend(**instance, **options) for instance in radarr_instances]
+        self._sonarrs = [
+            Backend("Sonarr", sonarr_host, sonarr_apikey, route=sonarr_route, **options)
+        ] + [Backend(**instance, **options) for instance in sonarr_instances]
+        self._radarr = self._radarrs[0]
+        self._sonarr = self._sonarrs[0]
+        # Optional DiskCache for rarely changing configuration such as
+        # quality profiles and root folders.
+        self._cache = cache
+        # Optional DiskCache of (series, season) -> {episode number: episode}
+        self._episode_cache = episode_cache
+        # Optional LibraryIndex mirroring the Radarr/Sonarr libraries
+        self._library = library
+        # Optional DiskCache of tmdb id -> Series, filled by prefetch_episodes
+        self._prefetch_cache = prefetch_cache
+        # Optional DiskCache of download queue pages
+        self._queue_cache = queue_cache
+        # Series added for one season or episode monitor only that season
+        # and search what was asked for first (see search_episodes and
+        # search_series)
+        self._targeted_search = targeted_search
+        # Optional DiskCache of TMDb -> TVDB / series ids
+        self._id_cache = id_cache
+        # Optional DiskCache of recent lookup payloads
+        self._lookup_cache = lookup_cache
+        # Upper bound for a fan-out: every attempt of a request timing out
+        # on both connect and read.
+        per_attempt = sum(timeout) if isinstance(timeout, tuple) else timeout
+        self._fanout_timeout = per_attempt * (1 + retries)
+        self._executor = None
+        # Separate pool for querying every instance of a backend at once, so
+        # an instance fan-out inside a _gather call cannot starve it.
+        self._instance_executor = None
 
-        self._sonarr_host = sonarr_host
-        if not self._sonarr_host.startswith("http"):
-            self._sonarr_host = "http://" + self._sonarr_host
+    def close(self):
+        """
+        Release pooled connections for every instance, and the library index
+        if one was given.
+        """
+        for executor in (self._executor, self._instance_executor):
+            if executor is not None:
+                executor.shutdown(wait=False)
+        self._executor = None
+        self._instance_executor = None
+        for backend in self._radarrs + self._sonarrs:
+            backend.close()
+        if self._library is not None:
+            self._library.close()
 
-        self._sonarr_apikey = sonarr_apikey
-        self._radarr_headers = {"X-Api-Key": self._radarr_apikey}
-        self._sonarr_headers = {"X-Api-Key": self._sonarr_apikey}
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
     # ----------------------------------------------------------------------
     # Helpers
     # ----------------------------------------------------------------------
-    def _get_radarr_quality_profile_id(self):
-        return self._get_quality_profile_id(self._radarr_host, self._radarr_headers)
+    def _gather(self, *calls):
+        """
+        Run independent calls concurrently and return their results in order.
+        The first exception raised by any call is re-raised here, and the
+        whole fan-out is limited by the request timeout (connect + read, for
+        every retry); running past it raises BackendUnavailable.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+        futures = [self._executor.submit(call) for call in calls]
+        deadline = time.monotonic() + self._fanout_timeout
+        try:
+            return [f.result(timeout=max(0, deadline - time.monotonic())) for f in futures]
+        except FutureTimeoutError:
+            for f in futures:
+                f.cancel()
+            raise BackendUnavailable("Timed out waiting for the server to respond.")
+
+    def _first_hit(self, backends, call):
+        """
+        Run call(backend) on every instance concurrently and return the
+        first result that is not None, without waiting for the others.
+        Instances that are down are skipped; BackendUnavailable is only
+        raised when none of them answered.
+        """
+        if len(backends) == 1:
+            return call(backends[0])
+        if self._instance_executor is None:
+            workers = MAX_WORKERS * max(len(self._radarrs), len(self._sonarrs))
+            self._instance_executor = ThreadPoolExecutor(max_workers=workers)
+        futures = [self._instance_executor.submit(call, backend) for backend in backends]
+        answered = 0
+        error = None
+        try:
+            for future in as_completed(futures, timeout=self._fanout_timeout):
+                try:
+                    result = future.result()
+                except BackendUnavailable as e:
+                    error = e
+                    continue
+                answered += 1
+                if result is not None:
+                    return result
+        except FutureTimeoutError:
+            error = BackendUnavailable("Timed out waiting for the server to respond.")
+        finally:
+            for f in futures:
+                f.cancel()
+        if not answered and error is not None:
+            raise error
+        return None
+
+    def _route(self, backends, item):
+        """
+        Instances an item may be added to, in order of preference: those
+        whose rules match it, then those without rules. Instances whose
+        circuit is open are left out.
+        """
+        specific = [b for b in backends if b.route.specific and b.route.matches(item)]
+        general = [b for b in backends if not b.route.specific]
+        return [b for b in specific + general if b.available]
+
+    def _lookup_backend(self, backends):
+        """
+        The instance to look new titles up on: the first catch-all one that
+        is up, else any that is up.
+        """
+        return (self._route(backends, {}) or [b for b in backends if b.available] or backends)[0]
+
+    def _route_add(self, backends, lookup):
+        """
+        Look an item up and return (item, candidates), where candidates
+        yields (backend, quality profile id, root folder) for each instance
+        the item may be added to, in routing order.
+        The lookup runs on the first catch-all instance together with its
+        profile and root folder lookups, so with a single instance, or when
+        no rule matches, adding takes no extra round trip.
+        """
+        first = self._lookup_backend(backends)
+        item, profile_id, root_folder = self._gather(
+            lambda: lookup(first),
+            lambda: self._get_quality_profile_id(first),
+            lambda: self._get_root_folder_path(first),
+        )
+
+        def candidates():
+            for backend in self._route(backends, item or {}):
+                if backend is first:
+                    yield backend, profile_id, root_folder
+                    continue
+                try:
+                    yield (
+                        backend,
+                        *self._gather(
+                            lambda: self._get_quality_profile_id(backend),
+                            lambda: self._get_root_folder_path(backend),
+                        ),
+                    )
+                except BackendUnavailable as e:
+                    log(f"Skipping {backend.name}: {e}", xbmc.LOGWARNING)
+
+        return item, candidates()
+
+    def _backend_for(self, backends, record):
+        """
+        The instance a record was found on, defaulting to the primary one.
+        """
+        host = getattr(record, "host", None)
+        for backend in backends:
+            if backend.host == host:
+                return backend
+        return backends[0]
+
+    def _cache_get(self, backend, name):
+        if self._cache is None:
+            return None
+        value = self._cache.get(f"{backend.host}|{name}")
+        stats.incr(f"cache {name} {'hit' if value is not None else 'miss'}")
+        return value
+
+    def _cache_set(self, backend, name, value):
+        if self._cache is not None:
+            self._cache.set(f"{backend.host}|{name}", value)
+
+    def _id_get(self, key):
+        if self._id_cache is None:
+            return None
+        value = self._id_cache.get(key, ttl=ID_TTL)
+        stats.incr(f"cache ids {'hit' if value is not None else 'miss'}")
+        return value
 
-    def _get_sonarr_quality_profile_id(self):
-        return self._get_quality_profile_id(self._sonarr_host, self._sonarr_headers)
+    def _id_set(self, key, value):
+        if self._id_cache is not None and value:
+            self._id_cache.set(key, value)
 
-    def _get_quality_profile_id(self, host, headers):
-        url = f"{host}/api/v3/qualityprofile"
+    def _lookup(self, backend, key, fetch, fields):
+        """
+        Return a lookup payload, reusing one fetched less than LOOKUP_TTL
+        seconds ago. Payloads of titles already in the library are not
+        kept, since the title may be deleted in the meantime.
+        """
+        key = f"{backend.host}|{key}"
+        if self._lookup_cache is not None:
+            cached = self._lookup_cache.get(key, ttl=LOOKUP_TTL)
+            stats.incr(f"cache lookup {'hit' if cached is not None else 'miss'}")
+            if cached is not None:
+                return cached
+        payload = fetch()
+        if self._lookup_cache is not None and payload and not payload.get("id"):
+            self._lookup_cache.set(key, {f: payload[f] for f in fields if f in payload})
+        return payload
+
+    def _forget_lookup(self, backend, key):
+        if self._lookup_cache is not None:
+            self._lookup_cache.delete(f"{backend.host}|{key}")
+
+    def _get_quality_profile_id(self, backend):
+        wanted = backend.route.profile or "Any"
+        name = "qualityprofile" if wanted == "Any" else f"qualityprofile|{wanted}"
+        cached = self._cache_get(backend, name)
+        if cached is not None:
+            return cached
         try:
-            r = requests.get(url, headers=headers)
+            r = backend.get("/api/v3/qualityprofile")
             r.raise_for_status()
             profiles = r.json()
             if profiles:
-                # Prefer 'Any;'
+                # Prefer the configured profile, or 'Any'
+                profile_id = profiles[0]["id"]
                 for profile in profiles:
-                    if profile["name"] == "Any":
-                        return profile["id"]
-                return profiles[0]["id"]
+                    if profile["name"].lower() == wanted.lower():
+                        profile_id = profile["id"]
+                        break
+                else:
+                    if wanted != "Any":
+                        log(f"{backend.name} has no quality profile '{wanted}'", xbmc.LOGWARNING)
+                self._cache_set(backend, name, profile_id)
+                return profile_id
+        except BackendUnavailable:
+            raise
         except Exception as e:
             log(f"Error getting quality profile: {e}", xbmc.LOGERROR)
         return 1
 
-    def _get_radarr_root_folder_path(self):
-        return self._get_root_folder_path(self._radarr_host, self._radarr_headers)
-
-    def _get_sonarr_root_folder_path(self):
-        return self._get_root_folder_path(self._sonarr_host, self._sonarr_headers)
-
-    def _get_root_folder_path(self, host, headers):
-        url = f"{host}/api/v3/rootfolder"
+    def _get_root_folder_path(self, backend):
+        cached = self._cache_get(backend, "rootfolder")
+        if cached is not None:
+            return cached
         try:
-            r = requests.get(url, headers=headers)
+            r = backend.get("/api/v3/rootfolder")
             r.raise_for_status()
             folders = r.json()
             if folders:
+                self._cache_set(backend, "rootfolder", folders[0]["path"])
                 return folders[0]["path"]
+        except BackendUnavailable:
+            raise
         except Exception as e:
             log(f"Error getting root folder: {e}", xbmc.LOGERROR)
         return ""
 
+    def _library_lookup(self, kind, backends, tmdb_id):
+        """
+        Look a title up in the local index of every instance. A miss only
+        counts when no instance's index is stale.
+        """
+        if self._library is None:
+            return None
+        stale = False
+        for backend in backends:
+            if self._library.age(backend.host, kind) > LIBRARY_MAX_AGE:
+                stale = True
+                continue
+            if kind == "movies":
+                found = self._library.get_movie(backend.host, tmdb_id)
+            else:
+                found = self._library.get_series(backend.host, tmdb_id)
+            if found:
+                stats.incr(f"library {kind} hit")
+                return found
+        stats.incr(f"library {kind} {'stale' if stale else 'miss'}")
+        return None
+
+    def refresh_library(self, max_age=0):
+        """
+        Pull the full library of every instance into the local index if it
+        is older than max_age seconds. Only changed rows are written.
+        """
+        if self._library is None:
+            return
+        jobs = []
+        for backend in self._radarrs:
+            if self._library.age(backend.host, "movies") > max_age:
+                jobs.append(("movies", backend, "/api/v3/movie", self._library.sync_movies))
+        for backend in self._sonarrs:
+            if self._library.age(backend.host, "series") > max_age:
+                jobs.append(("series", backend, "/api/v3/series", self._library.sync_series))
+        if not jobs:
+            return
+
+        def pull(kind, backend, path, sync):
+            try:
+                # Stream the listing straight into the index instead of
+                # decoding the full payload first.
+                with backend.get(path, stream=True) as r:
+                    r.raise_for_status()
+                    sync(backend.host, iter_array(r))
+            except Exception as e:
+                log(f"Error refreshing library index ({backend.name}): {e}", xbmc.LOGERROR)
+
+        # Bulk pulls can take much longer than a lookup, so they get their
+        # own threads instead of holding the shared request pool's workers
+        # while a play waits on them, and rely on the per-request timeout.
+        with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+            for job in jobs:
+                executor.submit(pull, *job)
+
     # ----------------------------------------------------------------------
     # Movie Methods
     # ----------------------------------------------------------------------
     def get_movie(self, tmdb_id):
         """
-        Check if a movie exists in Radarr.
-        Returns the movie object if found, None otherwise.
+        Check if a movie exists in any Radarr instance.
+        Returns a Movie if found, None otherwise.
         """
-        check_url = f"{self._radarr_host}/api/v3/movie?tmdbId={tmdb_id}"
+        movie = self._library_lookup("movies", self._radarrs, tmdb_id)
+        if movie:
+            return movie
+        return self._first_hit(self._radarrs, lambda backend: self._get_movie(backend, tmdb_id))
+
+    def _get_movie(self, backend, tmdb_id):
         try:
-            r = requests.get(check_url, headers=self._radarr_headers)
-            r.raise_for_status()
-            existing_movies = r.json()
-            if existing_movies:
-                return existing_movies[0]
+            with backend.get("/api/v3/movie", params={"tmdbId": tmdb_id}, stream=True) as r:
+                r.raise_for_status()
+                movie = first_item(r)
+            if movie:
+                return _on_host(Movie.from_api(movie), backend)
+        except BackendUnavailable:
+            raise
         except Exception as e:
             log(f"Error checking for movie: {e}", xbmc.LOGERROR)
         return None
 
     def add_movie(self, tmdb_id):
         """
-        Add a movie to Radarr.
-        Returns the added movie object.
+        Add a movie to the first Radarr instance its routing rules pick,
+        skipping instances that are down.
+        Returns the added Movie.
         """
-        # Grab movie data for payload
-        lookup_url = f"{self._radarr_host}/api/v3/movie/lookup/tmdb?tmdbId={tmdb_id}"
-        r = requests.get(lookup_url, headers=self._radarr_headers)
-        r.raise_for_status()
-        movie = r.json()
+        # Grab movie data, quality profile and root folder concurrently
+        movie, candidates = self._route_add(
+            self._radarrs, lambda backend: self._lookup_movie(tmdb_id, backend)
+        )
 
-        # Prepare payload
-        movie["qualityProfileId"] = self._get_radarr_quality_profile_id()
-        movie["rootFolderPath"] = self._get_radarr_root_folder_path()
-        movie["monitored"] = True
-        movie["addOptions"] = {"searchForMovie": True}
+        for backend, profile_id, root_folder in candidates:
+            # Prepare payload
+            payload = dict(movie)
+            payload["qualityProfileId"] = profile_id
+            payload["rootFolderPath"] = root_folder
+            payload["monitored"] = True
+            payload["addOptions"] = {"searchForMovie": True}
 
-        if not movie["rootFolderPath"]:
-            raise Exception("No root folder found in Radarr configuration.")
+            if not payload["rootFolderPath"]:
+                raise Exception(f"No root folder found in {backend.name} configuration.")
 
-        # Add movie
-        if ENABLE_REQUESTS:
-            post_url = f"{self._radarr_host}/api/v3/movie"
-            r = requests.post(post_url, json=movie, headers=self._radarr_headers)
+            # Add movie
+            if not ENABLE_REQUESTS:
+                return _on_host(Movie.from_api(payload), backend)
+            try:
+                r = backend.post("/api/v3/movie", json=payload)
+            except BackendUnavailable as e:
+                log(f"Skipping {backend.name}: {e}", xbmc.LOGWARNING)
+                continue
+            if r.status_code == 409:
+                raise AlreadyAdded(
+                    f"Movie '{movie.get('title')}' is already added.",
+                    _on_host(Movie.from_api(movie), backend),
+                )
+            r.raise_for_status()
+            self._forget_lookup(backend, f"movie|{tmdb_id}")
+            return _on_host(Movie.from_api(r.json()), backend)
+
+        raise BackendUnavailable(f"No Radarr instance is available for '{movie.get('title')}'.")
+
+    def _lookup_movie(self, tmdb_id, backend=None):
+        backend = backend or self._radarr
+
+        def fetch():
+            r = backend.get("/api/v3/movie/lookup/tmdb", params={"tmdbId": tmdb_id})
             r.raise_for_status()
             return r.json()
-        else:
-            return movie
+
+        return self._lookup(backend, f"movie|{tmdb_id}", fetch, MOVIE_LOOKUP_FIELDS)
 
     def request_movie(self, tmdb_id):
         """
@@ -119,31 +683,31 @@ class MediaClient:
         2. If yes, return status (available/monitored).
         3. If no, add it and return status (requested).
         """
-        movie = self.get_movie(tmdb_id)
+        try:
+            movie = self.get_movie(tmdb_id)
+        except BackendUnavailable as e:
+            return _unavailable_result(e)
 
         if movie:
-            is_available = movie.get("hasFile", False)
-            status = "available" if is_available else "monitored"
-            message = (
-                f"Movie '{movie.get('title')}' is already downloaded and available."
-                if is_available
-                else f"Movie '{movie.get('title')}' is already monitored but not yet downloaded."
-            )
-            return {
-                "status": status,
-                "message": message,
-                "available": is_available,
-                "data": movie,
-            }
+            return self._existing_movie_result(movie)
         else:
             try:
                 new_movie = self.add_movie(tmdb_id)
                 return {
                     "status": "requested",
-                    "message": f"Successfully requested movie: {new_movie.get('title')}",
+                    "message": f"Successfully requested movie: {new_movie.title}",
                     "available": False,
                     "data": new_movie,
                 }
+            except AlreadyAdded as e:
+                return {
+                    "status": "monitored",
+                    "message": str(e),
+                    "available": False,
+                    "data": e.data,
+                }
+            except BackendUnavailable as e:
+                return _unavailable_result(e)
             except Exception as e:
                 log(f"Error adding movie: {e}", xbmc.LOGERROR)
                 return {
@@ -153,118 +717,251 @@ class MediaClient:
                     "data": None,
                 }
 
+    def _existing_movie_result(self, movie):
+        is_available = bool(movie.has_file)
+        status = "available" if is_available else "monitored"
+        message = (
+            f"Movie '{movie.title}' is already downloaded and available."
+            if is_available
+            else f"Movie '{movie.title}' is already monitored but not yet downloaded."
+        )
+        return {
+            "status": status,
+            "message": message,
+            "available": is_available,
+            "data": movie,
+        }
+
     # ----------------------------------------------------------------------
     # Series Methods
     # ----------------------------------------------------------------------
-    def get_series(self, tmdb_id):
+    def get_series(self, tmdb_id, tvdb_id=None):
+        """
+        Check if a series exists in any Sonarr instance.
+        Pass the TVDB id when known (TMDb Helper provides it) so Sonarr's
+        own library can be asked directly.
+        Returns a Series if found, None otherwise.
         """
-        Check if a series exists in Sonarr.
-        Returns the fully detailed series object if found, None otherwise.
+        series = self._library_lookup("series", self._sonarrs, tmdb_id)
+        if series:
+            return series
+        if tvdb_id:
+            self._id_set(f"tvdb|{tmdb_id}", int(tvdb_id))
+        return self._first_hit(self._sonarrs, lambda backend: self._get_series(backend, tmdb_id))
+
+    def _get_series(self, backend, tmdb_id):
         """
-        # 1. Lookup to find internal ID
-        lookup_url = f"{self._sonarr_host}/api/v3/series/lookup?term=tmdb:{tmdb_id}"
+        Resolve a series from the remembered series id, else by TVDB id in
+        the instance's library; only a TMDb id seen for the first time
+        needs a (remote) lookup to learn its TVDB id.
+        """
+        key = f"{backend.host}|series|{tmdb_id}"
         try:
-            r = requests.get(lookup_url, headers=self._sonarr_headers)
+            # 1. Known internal ID
+            series_id = self._id_get(key)
+            if series_id:
+                r = backend.get(f"/api/v3/series/{series_id}")
+                if r.status_code != 404:
+                    r.raise_for_status()
+                    return _on_host(Series.from_api(r.json()), backend)
+                self._id_cache.delete(key)
+
+            # 2. Library query by TVDB ID, looked up once
+            tvdb_id = self._id_get(f"tvdb|{tmdb_id}")
+            if not tvdb_id:
+                series_candidate = self._lookup_series(tmdb_id, backend)
+                if not series_candidate or not series_candidate.get("tvdbId"):
+                    return None
+                tvdb_id = series_candidate["tvdbId"]
+            r = backend.get("/api/v3/series", params={"tvdbId": tvdb_id})
             r.raise_for_status()
-            series_list = r.json()
-            if not series_list:
-                return None
-
-            series_candidate = series_list[0]
-            if series_candidate.get("id", 0) > 0:
-                # 2. Fetch full details using internal ID
-                series_id = series_candidate["id"]
-                detail_url = f"{self._sonarr_host}/api/v3/series/{series_id}"
-                r_detail = requests.get(detail_url, headers=self._sonarr_headers)
-                r_detail.raise_for_status()
-                return r_detail.json()
+            found = r.json()
+            if found:
+                series = _on_host(Series.from_api(found[0]), backend)
+                self._id_set(key, series.id)
+                return series
+        except BackendUnavailable:
+            raise
         except Exception as e:
             log(f"Error getting series: {e}", xbmc.LOGERROR)
         return None
 
-    def get_episode(self, series_id, season_number, episode_number):
+    def get_episode(self, series_id, season_number, episode_number, series=None):
         """
         Fetch a specific episode from Sonarr.
+        Pass the series object when available so the right instance is
+        asked and a cached season index can be reused until the season
+        statistics change.
+        """
+        index = self.get_season_index(series_id, season_number, series)
+        if index is None:
+            return None
+        return index.get(str(episode_number))
+
+    def get_season_index(self, series_id, season_number, series=None):
         """
-        ep_url = f"{self._sonarr_host}/api/v3/episode?seriesId={series_id}&seasonNumber={season_number}"
+        Return {episode number (str): Episode} for one season, served from
+        the episode cache while it is still current.
+        Returns None if the season could not be fetched.
+        """
+        backend = self._backend_for(self._sonarrs, series)
+        key = f"{backend.host}|{series_id}|{season_number}"
+        version = series.season_version(season_number) if series else None
+
+        if self._episode_cache is not None:
+            cached = self._episode_cache.get(key, ttl=EPISODE_INDEX_TTL)
+            if cached and cached["version"] == version:
+                stats.incr("cache episodes hit")
+                return {
+                    num: Episode.from_dict(ep) for num, ep in cached["episodes"].items()
+                }
+            stats.incr("cache episodes miss")
+
         try:
-            r = requests.get(ep_url, headers=self._sonarr_headers)
-            r.raise_for_status()
-            episodes = r.json()
-            return next(
-                (ep for ep in episodes if ep["episodeNumber"] == episode_number),
-                None,
-            )
+            with backend.get(
+                "/api/v3/episode",
+                params={"seriesId": series_id, "seasonNumber": season_number},
+                stream=True,
+            ) as r:
+                r.raise_for_status()
+                index = {
+                    str(ep["episodeNumber"]): Episode.from_api(ep) for ep in iter_array(r)
+                }
+        except BackendUnavailable:
+            raise
         except Exception as e:
             log(f"Error getting episode: {e}", xbmc.LOGERROR)
             return None
 
-    def add_series(self, tmdb_id):
+        if self._episode_cache is not None:
+            self._episode_cache.set(
+                key,
+                {
+                    "version": version,
+                    "episodes": {num: ep.to_dict() for num, ep in index.items()},
+                },
+            )
+        return index
+
+    def add_series(self, tmdb_id, seasons=None, search=True):
         """
-        Add a series to Sonarr.
-        Returns the added series object.
+        Add a series to the first Sonarr instance its routing rules pick,
+        skipping instances that are down.
+        Every season is monitored unless seasons (season numbers) are given,
+        in which case only those are. With search, Sonarr searches the
+        monitored episodes right after adding.
+        Returns the added Series.
         """
-        # Lookup series data
-        lookup_url = f"{self._sonarr_host}/api/v3/series/lookup?term=tmdb:{tmdb_id}"
-        r = requests.get(lookup_url, headers=self._sonarr_headers)
-        r.raise_for_status()
-        series_list = r.json()
+        # Lookup series data, quality profile and root folder concurrently
+        series, candidates = self._route_add(
+            self._sonarrs, lambda backend: self._lookup_series(tmdb_id, backend)
+        )
 
-        if not series_list:
+        if not series:
             raise Exception(f"No series found for TMDB ID {tmdb_id}")
 
-        series = series_list[0]
         if series.get("id", 0) > 0:
-            raise Exception(f"Series '{series.get('title')}' is already added.")
+            raise AlreadyAdded(
+                f"Series '{series.get('title')}' is already added.", Series.from_api(series)
+            )
 
-        # Prepare payload
-        series["qualityProfileId"] = self._get_sonarr_quality_profile_id()
-        series["rootFolderPath"] = self._get_sonarr_root_folder_path()
-        series["monitored"] = True
+        for backend, profile_id, root_folder in candidates:
+            # Prepare payload
+            payload = dict(series)
+            payload["qualityProfileId"] = profile_id
+            payload["rootFolderPath"] = root_folder
+            payload["monitored"] = True
 
-        # Ensure addOptions is set
-        add_options = series.get("addOptions", {}) or {}
-        add_options["searchForMissingEpisodes"] = True
-        series["addOptions"] = add_options
+            # Ensure addOptions is set
+            add_options = dict(series.get("addOptions") or {})
+            add_options["searchForMissingEpisodes"] = search
+            payload["addOptions"] = add_options
 
-        # Ensure all seasons are monitored
-        if "seasons" in series:
-            for season in series["seasons"]:
-                season["monitored"] = True
+            # Ensure all seasons (or only the requested ones) are monitored
+            if "seasons" in series:
+                payload["seasons"] = [
+                    dict(s, monitored=seasons is None or s.get("seasonNumber") in seasons)
+                    for s in series["seasons"]
+                ]
 
-        if not series["rootFolderPath"]:
-            raise Exception("No root folder found in Sonarr configuration.")
+            if not payload["rootFolderPath"]:
+                raise Exception(f"No root folder found in {backend.name} configuration.")
 
-        # Add series
-        if ENABLE_REQUESTS:
-            post_url = f"{self._sonarr_host}/api/v3/series"
-            r = requests.post(post_url, json=series, headers=self._sonarr_headers)
+            # Add series
+            if not ENABLE_REQUESTS:
+                return _on_host(Series.from_api(payload), backend)
+            try:
+                r = backend.post("/api/v3/series", json=payload)
+            except BackendUnavailable as e:
+                log(f"Skipping {backend.name}: {e}", xbmc.LOGWARNING)
+                continue
+            if r.status_code == 409:
+                raise AlreadyAdded(
+                    f"Series '{series.get('title')}' is already added.",
+                    _on_host(Series.from_api(series), backend),
+                )
             r.raise_for_status()
-            return r.json()
-        else:
-            return series
+            added = _on_host(Series.from_api(r.json()), backend)
+            self._forget_lookup(backend, f"series|{tmdb_id}")
+            self._id_set(f"{backend.host}|series|{tmdb_id}", added.id)
+            return added
+
+        raise BackendUnavailable(f"No Sonarr instance is available for '{series.get('title')}'.")
+
+    def _lookup_series(self, tmdb_id, backend=None):
+        """
+        Return the best lookup candidate as a raw dict (it doubles as the
+        add payload), or None. Other candidates are skipped unparsed.
+        """
+        backend = backend or self._sonarr
+
+        def fetch():
+            with backend.get(
+                "/api/v3/series/lookup", params={"term": f"tmdb:{tmdb_id}"}, stream=True
+            ) as r:
+                r.raise_for_status()
+                return first_item(r)
+
+        series = self._lookup(backend, f"series|{tmdb_id}", fetch, SERIES_LOOKUP_FIELDS)
+        if series and series.get("tvdbId"):
+            self._id_set(f"tvdb|{tmdb_id}", series["tvdbId"])
+        return series
 
-    def request_series(self, tmdb_id, season=None, episode=None):
+    def request_series(self, tmdb_id, season=None, episode=None, tvdb_id=None):
         """
         High-level workflow:
         1. Check if series exists.
         2. If yes, check specific episode (if requested) or overall series status.
         3. If no, add series and return status.
         """
-        series = self.get_series(tmdb_id)
+        try:
+            series = None
+            if season is not None and episode is not None:
+                series = self._prefetched_series(tmdb_id)
+            if series is None:
+                series = self.get_series(tmdb_id, tvdb_id)
+        except BackendUnavailable as e:
+            return _unavailable_result(e)
 
         if series:
             # Series exists
             if season is not None and episode is not None:
                 # Check specific episode
-                ep_obj = self.get_episode(series["id"], season, episode)
+                try:
+                    ep_obj = self.get_episode(series.id, season, episode, series=series)
+                except BackendUnavailable as e:
+                    return _unavailable_result(e)
+                if ep_obj and not ep_obj.has_file and not ep_obj.monitored:
+                    # Left out by a targeted add or unmonitored by hand:
+                    # nothing would ever grab it
+                    return self._request_episode(series, ep_obj)
                 if ep_obj:
-                    is_available = ep_obj.get("hasFile", False)
+                    is_available = bool(ep_obj.has_file)
                     status = "available" if is_available else "monitored"
                     message = (
-                        f"Episode S{season:02d}E{episode:02d} of '{series.get('title')}' is downloaded and available."
+                        f"Episode S{season:02d}E{episode:02d} of '{series.title}' is downloaded and available."
                         if is_available
-                        else f"Episode S{season:02d}E{episode:02d} of '{series.get('title')}' is monitored but not yet downloaded."
+                        else f"Episode S{season:02d}E{episode:02d} of '{series.title}' is monitored but not yet downloaded."
                     )
                     return {
                         "status": status,
@@ -281,10 +978,10 @@ class MediaClient:
                     }
             else:
                 # Check Series Availability
-                stats = series.get("statistics", {})
-                file_count = stats.get("episodeFileCount", 0)
-                episode_count = stats.get("episodeCount", 0)
-                percent = stats.get("percentOfEpisodes", 0)
+                series_stats = series.statistics or {}
+                file_count = series_stats.get("episodeFileCount", 0)
+                episode_count = series_stats.get("episodeCount", 0)
+                percent = series_stats.get("percentOfEpisodes", 0)
 
                 is_available = percent == 100 or (
                     file_count > 0 and file_count == episode_count
@@ -292,14 +989,14 @@ class MediaClient:
 
                 if is_available:
                     status = "available"
-                    message = f"Series '{series.get('title')}' is already downloaded and available."
+                    message = f"Series '{series.title}' is already downloaded and available."
                 elif file_count > 0:
                     status = "monitored"
                     remaining = episode_count - file_count
-                    message = f"Series '{series.get('title')}' is monitored. {file_count}/{episode_count} episodes downloaded ({remaining} remaining)."
+                    message = f"Series '{series.title}' is monitored. {file_count}/{episode_count} episodes downloaded ({remaining} remaining)."
                 else:
                     status = "monitored"
-                    message = f"Series '{series.get('title')}' is already monitored but not yet downloaded."
+                    message = f"Series '{series.title}' is already monitored but not yet downloaded."
 
                 return {
                     "status": status,
@@ -309,19 +1006,733 @@ class MediaClient:
                 }
         else:
             # Series Missing -> Add it
-            try:
-                new_series = self.add_series(tmdb_id)
+            if self._targeted_search and season is not None:
+                # The episode is searched by search_episodes once Sonarr
+                # knows the series' episodes, the rest of the series by
+                # search_series after that. pending_search and
+                # pending_series_search tell the caller to journal them
+                result = self._add_series_result(tmdb_id, {season}, search=episode is None)
+                if result["status"] == "requested":
+                    if episode is None:
+                        result["pending_series_search"] = True
+                    else:
+                        result["pending_search"] = [[season, episode]]
+                return result
+            return self._add_series_result(tmdb_id)
+
+    def _request_episode(self, series, ep_obj):
+        """
+        Monitor and search an episode of a series in Sonarr that is neither
+        monitored nor downloaded.
+        """
+        label = f"S{ep_obj.season_number:02d}E{ep_obj.episode_number:02d} of '{series.title}'"
+        try:
+            backend = self._backend_for(self._sonarrs, series)
+            self._monitor_episodes(backend, series.id, [ep_obj])
+            self._command(backend, {"name": "EpisodeSearch", "episodeIds": [ep_obj.id]})
+        except BackendUnavailable as e:
+            return _unavailable_result(e)
+        except Exception as e:
+            log(f"Error requesting episode: {e}", xbmc.LOGERROR)
+            return {
+                "status": "error",
+                "message": f"Error requesting episode: {e}",
+                "available": False,
+                "data": None,
+            }
+        ep_obj.monitored = True
+        return {
+            "status": "requested",
+            "message": f"Episode {label} was not monitored and is now requested.",
+            "available": False,
+            "data": ep_obj,
+        }
+
+    def _add_series_result(self, tmdb_id, seasons=None, search=True):
+        try:
+            new_series = self.add_series(tmdb_id, seasons, search)
+            return {
+                "status": "requested",
+                "message": f"Successfully requested series: {new_series.title}",
+                "available": False,
+                "data": new_series,
+            }
+        except AlreadyAdded as e:
+            return {
+                "status": "monitored",
+                "message": str(e),
+                "available": False,
+                "data": e.data,
+            }
+        except BackendUnavailable as e:
+            return _unavailable_result(e)
+        except Exception as e:
+            log(f"Error adding series: {e}", xbmc.LOGERROR)
+            return {
+                "status": "error",
+                "message": f"Error adding series: {e}",
+                "available": False,
+                "data": None,
+            }
+
+    def search_episode(self, tmdb_id, season, episode, wait=EPISODE_WAIT):
+        """
+        search_episodes for one episode (journal entries queued before
+        request_episodes could add series with targeted search).
+        """
+        return self.search_episodes(tmdb_id, [(season, episode)], wait)
+
+    def search_episodes(self, tmdb_id, episodes, wait=EPISODE_WAIT):
+        """
+        Search for the (season, episode) pairs of a series request_series or
+        request_episodes has just added with targeted search (see
+        pending_search), instead of every monitored episode.
+        Waits up to wait seconds for Sonarr to list the seasons' episodes,
+        then issues one EpisodeSearch for them. Seasons with episodes that
+        cannot be found are searched whole instead. The result asks for the
+        rest of the series to be searched later (pending_series_search).
+        Errors sending the search are raised, so a journaled search is
+        retried.
+        """
+        series = self.get_series(tmdb_id)
+        if not series:
+            raise BackendError(f"Series {tmdb_id} not found")
+        backend = self._backend_for(self._sonarrs, series)
+        wanted = list(dict.fromkeys((int(s), int(e)) for s, e in episodes))
+
+        found = {}
+        deadline = time.time() + wait
+        try:
+            while True:
+                for season in sorted({s for s, e in wanted if (s, e) not in found}):
+                    r = backend.get(
+                        "/api/v3/episode", params={"seriesId": series.id, "seasonNumber": season}
+                    )
+                    r.raise_for_status()
+                    for ep in r.json():
+                        key = (season, ep.get("episodeNumber"))
+                        if key in wanted:
+                            found[key] = Episode.from_api(ep)
+                if len(found) == len(wanted) or time.time() >= deadline:
+                    break
+                time.sleep(EPISODE_POLL_INTERVAL)
+        except BackendUnavailable:
+            raise
+        except Exception as e:
+            log(f"Error listing episodes: {e}", xbmc.LOGWARNING)
+
+        listed = [found[key] for key in wanted if key in found]
+        unlisted = sorted({s for s, e in wanted if (s, e) not in found})
+        if listed:
+            self._monitor_episodes(backend, series.id, listed)
+            self._command(backend, {"name": "EpisodeSearch", "episodeIds": [ep.id for ep in listed]})
+        for season in unlisted:
+            log(f"Season {season} of '{series.title}' is not listed yet, searching it", xbmc.LOGWARNING)
+            self._command(
+                backend, {"name": "SeasonSearch", "seriesId": series.id, "seasonNumber": season}
+            )
+
+        if len(wanted) > 1:
+            message = f"Searching {len(wanted)} episodes of '{series.title}'."
+        elif listed:
+            season, episode = wanted[0]
+            message = f"Searching S{season:02d}E{episode:02d} of '{series.title}'."
+        else:
+            message = f"Searching season {unlisted[0]} of '{series.title}'."
+        log(message, xbmc.LOGINFO)
+        return {
+            "status": "requested",
+            "message": message,
+            "available": False,
+            "data": series,
+            "pending_series_search": True,
+        }
+
+    def search_series(self, tmdb_id):
+        """
+        Monitor every season of a series added with targeted search and
+        search all its missing episodes, as a plain add would have done.
+        Journaled (see pending_series_search) to run a while after the
+        requested episode or season was searched, so that one is grabbed
+        first. Errors are raised, so the search is retried.
+        """
+        series = self.get_series(tmdb_id)
+        if not series:
+            raise BackendError(f"Series {tmdb_id} not found")
+        backend = self._backend_for(self._sonarrs, series)
+        if ENABLE_REQUESTS:
+            r = backend.post(
+                "/api/v3/seasonpass",
+                json={
+                    "series": [{"id": series.id, "monitored": True}],
+                    "monitoringOptions": {"monitor": "all"},
+                },
+            )
+            r.raise_for_status()
+        if self._episode_cache is not None:
+            self._episode_cache.delete_prefix(f"{backend.host}|{series.id}|")
+        self._command(backend, {"name": "SeriesSearch", "seriesId": series.id})
+        message = f"Searching the rest of '{series.title}'."
+        log(message, xbmc.LOGINFO)
+        return {"status": "requested", "message": message, "available": False, "data": series}
+
+    # ----------------------------------------------------------------------
+    # Prefetch
+    # ----------------------------------------------------------------------
+    def prefetch_episodes(self, tmdb_id, season, episode, count=PREFETCH_EPISODES, request=False):
+        """
+        Warm the caches for the count episodes after SxxEyy and for the next
+        season, so an autoplay-next request is answered without contacting
+        Sonarr. With request, those without a file are monitored and
+        searched ahead of time.
+        Returns the upcoming episodes.
+        """
+        series = self.get_series(tmdb_id)
+        if not series:
+            return []
+        if self._prefetch_cache is not None:
+            self._prefetch_cache.set(str(tmdb_id), series.to_dict())
+
+        seasons = (season, season + 1)
+        indexes = self._gather(
+            *(lambda s=s: self.get_season_index(series.id, s, series) or {} for s in seasons)
+        )
+        upcoming = [
+            ep
+            for s, index in zip(seasons, indexes)
+            for ep in sorted(index.values(), key=lambda ep: ep.episode_number)
+            if s > season or ep.episode_number > episode
+        ][:count]
+
+        wanted = [ep for ep in upcoming if not ep.has_file]
+        if request and wanted:
+            backend = self._backend_for(self._sonarrs, series)
+            self._monitor_episodes(backend, series.id, wanted)
+            self._command(backend, {"name": "EpisodeSearch", "episodeIds": [ep.id for ep in wanted]})
+            # Monitoring dropped these seasons from the cache; warm them again
+            for s in {ep.season_number for ep in wanted}:
+                self.get_season_index(series.id, s, series)
+
+        log(
+            f"Prefetched {len(upcoming)} episodes of '{series.title}' after "
+            f"S{season:02d}E{episode:02d} ({len(wanted)} missing)",
+            xbmc.LOGDEBUG,
+        )
+        return upcoming
+
+    def _prefetched_series(self, tmdb_id):
+        if self._prefetch_cache is None:
+            return None
+        cached = self._prefetch_cache.get(str(tmdb_id), ttl=PREFETCH_TTL)
+        stats.incr(f"cache prefetch {'hit' if cached is not None else 'miss'}")
+        return Series.from_dict(cached) if cached is not None else None
+
+    # ----------------------------------------------------------------------
+    # Queue
+    # ----------------------------------------------------------------------
+    def get_queue_page(self, page=1, page_size=QUEUE_PAGE_SIZE):
+        """
+        Fetch one page of the download queue from every Radarr and Sonarr
+        instance concurrently, so listing the first page never waits for
+        the whole queue.
+        Returns {"items": [QueueItem], "more": bool}, where more is True
+        while any instance has further pages.
+        """
+        key = f"{page}|{page_size}"
+        if self._queue_cache is not None:
+            cached = self._queue_cache.get(key, ttl=QUEUE_TTL)
+            stats.incr(f"cache queue {'hit' if cached is not None else 'miss'}")
+            if cached is not None:
                 return {
-                    "status": "requested",
-                    "message": f"Successfully requested series: {new_series.get('title')}",
-                    "available": False,
-                    "data": new_series,
+                    "items": [QueueItem.from_dict(item) for item in cached["items"]],
+                    "more": cached["more"],
                 }
+
+        sources = [(b, "movie") for b in self._radarrs] + [(b, "episode") for b in self._sonarrs]
+        pages = self._gather(
+            *(lambda b=b, k=k: self._queue_page(b, k, page, page_size) for b, k in sources)
+        )
+        items = [item for records, _ in pages for item in records]
+        # Soonest to finish first, unknown ETAs last
+        items.sort(key=lambda item: (item.eta is None, item.eta or 0))
+        more = any(page * page_size < total for _, total in pages)
+
+        if self._queue_cache is not None:
+            self._queue_cache.set(key, {"items": [i.to_dict() for i in items], "more": more})
+        return {"items": items, "more": more}
+
+    def _queue_page(self, backend, kind, page, page_size):
+        """
+        Returns ([QueueItem], total records) for one instance.
+        """
+        params = {"page": page, "pageSize": page_size}
+        if kind == "movie":
+            params["includeMovie"] = "true"
+        else:
+            params["includeSeries"] = "true"
+            params["includeEpisode"] = "true"
+        try:
+            r = backend.get("/api/v3/queue", params=params)
+            r.raise_for_status()
+            data = r.json()
+        except Exception as e:
+            log(f"Error getting {backend.name} queue: {e}", xbmc.LOGERROR)
+            return [], 0
+        records = [
+            QueueItem.from_queue(record, kind, backend.name)
+            for record in data.get("records") or []
+        ]
+        return records, data.get("totalRecords") or 0
+
+    # ----------------------------------------------------------------------
+    # Download Status
+    # ----------------------------------------------------------------------
+    def get_download_status(self, tmdb_id, season=None, episode=None, tvdb_id=None):
+        """
+        Where a requested movie or episode stands, asking only the instance
+        that owns it and only about that title, so it is cheap to poll.
+        Returns {"state", "title", "progress", "eta", "message"}, where state
+        is "downloading", "queued" (grabbed, not transferring yet),
+        "waiting" (no release grabbed), "available" or "missing".
+        """
+        if season is None:
+            record = self.get_movie(tmdb_id)
+            if not record:
+                return _download_status("missing")
+            backend = self._backend_for(self._radarrs, record)
+            params = {"movieId": record.id, "includeMovie": "true"}
+            path, kind = f"/api/v3/movie/{record.id}", "movie"
+        else:
+            series = self.get_series(tmdb_id, tvdb_id)
+            record = series and self.get_episode(series.id, season, episode, series)
+            if not record:
+                return _download_status("missing")
+            backend = self._backend_for(self._sonarrs, series)
+            params = {
+                "seriesId": series.id,
+                "episodeIds": record.id,
+                "includeSeries": "true",
+                "includeEpisode": "true",
+            }
+            path, kind = f"/api/v3/episode/{record.id}", "episode"
+
+        r = backend.get("/api/v3/queue/details", params=params)
+        r.raise_for_status()
+        details = r.json()
+        if details:
+            data = details[0]
+            item = QueueItem.from_queue(data, kind, backend.name)
+            transferring = data.get("status") == "downloading" or data.get(
+                "trackedDownloadState"
+            ) in ("importPending", "importing")
+            return _download_status(
+                "downloading" if transferring else "queued",
+                title=item.title,
+                progress=item.progress,
+                eta=item.eta,
+                message=item.error,
+            )
+
+        # Not in the queue: either imported since the last check, or still
+        # waiting for a release
+        r = backend.get(path)
+        r.raise_for_status()
+        data = r.json()
+        title = data.get("title") if season is None else _episodes_label(series, [data])
+        if not data.get("hasFile"):
+            return _download_status("waiting", title=title)
+
+        if season is None:
+            if self._library is not None:
+                self._library.update_movie(tmdb_id, record.id, True)
+        elif self._episode_cache is not None:
+            self._episode_cache.delete(f"{backend.host}|{series.id}|{season}")
+        return _download_status("available", title=title, progress=100.0)
+
+    # ----------------------------------------------------------------------
+    # Webhooks
+    # ----------------------------------------------------------------------
+    def apply_event(self, event):
+        """
+        Update or drop the cached state a Radarr/Sonarr webhook event
+        affects, so cached answers stay correct without polling.
+        Returns a label for the title the event is about, or None if the
+        event carries none.
+        """
+        event_type = event.get("eventType")
+        stats.incr(f"webhook {event_type}")
+        if event_type in ("Grab", "Download") and self._queue_cache is not None:
+            self._queue_cache.clear()
+        if event.get("movie"):
+            return self._apply_movie_event(event_type, event["movie"])
+        if event.get("series"):
+            return self._apply_series_event(event_type, event["series"], event.get("episodes") or [])
+        return None
+
+    def _apply_movie_event(self, event_type, movie):
+        tmdb_id = movie.get("tmdbId")
+        if self._library is not None and tmdb_id and movie.get("id"):
+            if event_type in ("Download", "MovieFileDelete"):
+                self._library.update_movie(tmdb_id, movie["id"], event_type == "Download")
+            elif event_type == "MovieDelete":
+                self._library.remove_movie(tmdb_id, movie["id"])
+        if event_type == "MovieDelete" and tmdb_id:
+            for backend in self._radarrs:
+                self._forget_lookup(backend, f"movie|{tmdb_id}")
+        return movie.get("title")
+
+    def _apply_series_event(self, event_type, series, episodes):
+        series_id = series.get("id")
+        if event_type not in ("Download", "EpisodeFileDelete", "SeriesDelete") or not series_id:
+            return _episodes_label(series, episodes)
+
+        if self._episode_cache is not None:
+            for backend in self._sonarrs:
+                if event_type == "SeriesDelete":
+                    self._episode_cache.delete_prefix(f"{backend.host}|{series_id}|")
+                for season in {ep.get("seasonNumber") for ep in episodes}:
+                    self._episode_cache.delete(f"{backend.host}|{series_id}|{season}")
+
+        tmdb_id = series.get("tmdbId")
+        if self._library is not None and series.get("tvdbId"):
+            tmdb_id = tmdb_id or self._library.tmdb_for_tvdb(series["tvdbId"])
+            self._library.remove_series(series_id, series["tvdbId"])
+        if event_type == "SeriesDelete" and tmdb_id:
+            for backend in self._sonarrs:
+                self._forget_lookup(backend, f"series|{tmdb_id}")
+                if self._id_cache is not None:
+                    self._id_cache.delete(f"{backend.host}|series|{tmdb_id}")
+        if self._prefetch_cache is not None:
+            # Older Sonarr versions only send the TVDB id
+            if tmdb_id:
+                self._prefetch_cache.delete(str(tmdb_id))
+            else:
+                self._prefetch_cache.clear()
+        return _episodes_label(series, episodes)
+
+    # ----------------------------------------------------------------------
+    # Batch Methods
+    # ----------------------------------------------------------------------
+    def request_movies(self, tmdb_ids):
+        """
+        Batch version of request_movie.
+        Existing movies are checked concurrently, and all missing ones are
+        added with a single bulk import sharing one quality profile and root
+        folder lookup.
+        Returns a list of results in the same order as tmdb_ids.
+        """
+        tmdb_ids = [int(t) for t in tmdb_ids]
+        existing = self._gather(*(lambda t=t: self.get_movie(t) for t in tmdb_ids))
+
+        results = {}
+        missing = []
+        for tmdb_id, movie in zip(tmdb_ids, existing):
+            if movie:
+                results[tmdb_id] = self._existing_movie_result(movie)
+            elif tmdb_id not in missing:
+                missing.append(tmdb_id)
+
+        if missing:
+            try:
+                added = self.add_movies(missing)
             except Exception as e:
-                log(f"Error adding series: {e}", xbmc.LOGERROR)
-                return {
-                    "status": "error",
-                    "message": f"Error adding series: {e}",
-                    "available": False,
-                    "data": None,
-                }
+                log(f"Error adding movies: {e}", xbmc.LOGERROR)
+                added = {tmdb_id: e for tmdb_id in missing}
+            for tmdb_id in missing:
+                movie = added.get(tmdb_id)
+                if isinstance(movie, Movie):
+                    results[tmdb_id] = {
+                        "status": "requested",
+                        "message": f"Successfully requested movie: {movie.title}",
+                        "available": False,
+                        "data": movie,
+                    }
+                else:
+                    results[tmdb_id] = {
+                        "status": "error",
+                        "message": f"Error adding movie: {movie or 'not imported'}",
+                        "available": False,
+                        "data": None,
+                    }
+
+        return [results[t] for t in tmdb_ids]
+
+    def add_movies(self, tmdb_ids):
+        """
+        Add several movies to Radarr with one bulk import per instance, each
+        movie routed like add_movie.
+        Returns {tmdb_id: added Movie, or the Exception that prevented its
+        lookup or import}.
+        """
+        first = self._lookup_backend(self._radarrs)
+
+        def lookup(tmdb_id):
+            try:
+                return self._lookup_movie(tmdb_id, first)
+            except Exception as e:
+                return e
+
+        profile_id, root_folder, *movies = self._gather(
+            lambda: self._get_quality_profile_id(first),
+            lambda: self._get_root_folder_path(first),
+            *(lambda t=t: lookup(t) for t in tmdb_ids),
+        )
+
+        results = {}
+        groups = {}
+        for tmdb_id, movie in zip(tmdb_ids, movies):
+            if isinstance(movie, Exception):
+                results[tmdb_id] = movie
+                continue
+            route = self._route(self._radarrs, movie)
+            if not route:
+                results[tmdb_id] = BackendUnavailable("No Radarr instance is available.")
+                continue
+            groups.setdefault(route[0], []).append(movie)
+
+        def submit(backend, movies):
+            try:
+                if backend is first:
+                    backend_profile_id, folder = profile_id, root_folder
+                else:
+                    backend_profile_id = self._get_quality_profile_id(backend)
+                    folder = self._get_root_folder_path(backend)
+                if not folder:
+                    raise Exception(f"No root folder found in {backend.name} configuration.")
+                payload = [
+                    dict(
+                        movie,
+                        qualityProfileId=backend_profile_id,
+                        rootFolderPath=folder,
+                        monitored=True,
+                        addOptions={"searchForMovie": True},
+                    )
+                    for movie in movies
+                ]
+                if ENABLE_REQUESTS:
+                    r = backend.post("/api/v3/movie/import", json=payload)
+                    r.raise_for_status()
+                    payload = r.json()
+                return [_on_host(Movie.from_api(movie), backend) for movie in payload]
+            except Exception as e:
+                log(f"Error adding movies to {backend.name}: {e}", xbmc.LOGERROR)
+                return e
+
+        added = self._gather(*(lambda b=b, m=m: submit(b, m) for b, m in groups.items()))
+        for (backend, movies), imported in zip(groups.items(), added):
+            if isinstance(imported, Exception):
+                for movie in movies:
+                    results[movie["tmdbId"]] = imported
+            else:
+                for movie in imported:
+                    results[movie.tmdb_id] = movie
+        return results
+
+    def request_season(self, tmdb_id, season):
+        """
+        Request every missing episode of one season.
+        Unmonitored episodes are monitored with a single bulk call and the
+        season is searched with one SeasonSearch command.
+        """
+        series = self.get_series(tmdb_id)
+        if not series:
+            if self._targeted_search:
+                result = self._add_series_result(tmdb_id, {season})
+                if result["status"] == "requested":
+                    result["pending_series_search"] = True
+                return result
+            return self._add_series_result(tmdb_id)
+
+        title = series.title
+        backend = self._backend_for(self._sonarrs, series)
+        index = self.get_season_index(series.id, season, series)
+        if not index:
+            return {
+                "status": "error",
+                "message": f"Season {season} of '{title}' not found.",
+                "available": False,
+                "data": None,
+            }
+
+        missing = [ep for ep in index.values() if not ep.has_file]
+        if not missing:
+            return {
+                "status": "available",
+                "message": f"Season {season} of '{title}' is downloaded and available.",
+                "available": True,
+                "data": series,
+            }
+
+        try:
+            self._monitor_episodes(backend, series.id, missing)
+            self._command(
+                backend, {"name": "SeasonSearch", "seriesId": series.id, "seasonNumber": season}
+            )
+        except Exception as e:
+            log(f"Error requesting season: {e}", xbmc.LOGERROR)
+            return {
+                "status": "error",
+                "message": f"Error requesting season: {e}",
+                "available": False,
+                "data": None,
+            }
+        return {
+            "status": "requested",
+            "message": f"Requested {len(missing)} missing episodes of '{title}' season {season}.",
+            "available": False,
+            "data": series,
+        }
+
+    def request_episodes(self, tmdb_id, episodes):
+        """
+        Request a list of (season, episode) pairs of one series.
+        Season indexes are fetched concurrently, and all missing episodes are
+        monitored and searched with one bulk call each.
+        Returns a list of results in the same order as episodes.
+        """
+        episodes = [(int(s), int(e)) for s, e in episodes]
+        series = self.get_series(tmdb_id)
+        if not series:
+            if self._targeted_search:
+                # Like request_series: only the requested seasons are
+                # monitored, and the episodes are searched by search_episodes
+                # once Sonarr lists them (pending_search)
+                result = self._add_series_result(tmdb_id, {s for s, _ in episodes}, search=False)
+                if result["status"] == "requested":
+                    result["pending_search"] = [list(pair) for pair in episodes]
+            else:
+                result = self._add_series_result(tmdb_id)
+            return [result for _ in episodes]
+
+        title = series.title
+        seasons = sorted({s for s, _ in episodes})
+        indexes = dict(
+            zip(
+                seasons,
+                self._gather(
+                    *(
+                        lambda s=s: self.get_season_index(series.id, s, series)
+                        for s in seasons
+                    )
+                ),
+            )
+        )
+
+        results = []
+        wanted = []
+        for season, episode in episodes:
+            label = f"S{season:02d}E{episode:02d} of '{title}'"
+            ep_obj = (indexes[season] or {}).get(str(episode))
+            if not ep_obj:
+                results.append(
+                    {
+                        "status": "error",
+                        "message": f"Episode {label} not found.",
+                        "available": False,
+                        "data": None,
+                    }
+                )
+            elif ep_obj.has_file:
+                results.append(
+                    {
+                        "status": "available",
+                        "message": f"Episode {label} is downloaded and available.",
+                        "available": True,
+                        "data": ep_obj,
+                    }
+                )
+            else:
+                wanted.append(ep_obj)
+                results.append(
+                    {
+                        "status": "requested",
+                        "message": f"Episode {label} requested.",
+                        "available": False,
+                        "data": ep_obj,
+                    }
+                )
+
+        if wanted:
+            try:
+                backend = self._backend_for(self._sonarrs, series)
+                self._monitor_episodes(backend, series.id, wanted)
+                self._command(
+                    backend, {"name": "EpisodeSearch", "episodeIds": [ep.id for ep in wanted]}
+                )
+            except Exception as e:
+                log(f"Error requesting episodes: {e}", xbmc.LOGERROR)
+                for result in results:
+                    if result["status"] == "requested":
+                        result["status"] = "error"
+                        result["message"] = f"Error requesting episodes: {e}"
+        return results
+
+    def _monitor_episodes(self, backend, series_id, episodes):
+        """
+        Mark episodes as monitored in one bulk call, skipping those that
+        already are, and drop the cached season indexes they belong to.
+        """
+        unmonitored = [ep for ep in episodes if not ep.monitored]
+        if not unmonitored or not ENABLE_REQUESTS:
+            return
+        r = backend.request(
+            "PUT",
+            "/api/v3/episode/monitor",
+            json={"episodeIds": [ep.id for ep in unmonitored], "monitored": True},
+        )
+        r.raise_for_status()
+        if self._episode_cache is not None:
+            for season in {ep.season_number for ep in unmonitored}:
+                self._episode_cache.delete(f"{backend.host}|{series_id}|{season}")
+
+    def _command(self, backend, body):
+        if not ENABLE_REQUESTS:
+            return None
+        r = backend.post("/api/v3/command", json=body)
+        r.raise_for_status()
+        return r.json()
+
+
+def _endpoint(path):
+    """
+    Collapse ids in a path so calls are aggregated per endpoint.
+    """
+    return re.sub(r"/\d+", "/{id}", path)
+
+
+def _split(value):
+    """
+    Parse a comma separated setting into a set of lowercase names.
+    """
+    return {v.strip().lower() for v in (value or "").split(",") if v.strip()}
+
+
+def _on_host(record, backend):
+    """
+    Tag a record with the instance it came from.
+    """
+    record.host = backend.host
+    return record
+
+
+def _episodes_label(series, episodes):
+    title = series.get("title")
+    if len(episodes) == 1:
+        ep = episodes[0]
+        title = f"{title} S{ep.get('seasonNumber', 0):02d}E{ep.get('episodeNumber', 0):02d}"
+    return title
+
+
+def _download_status(state, title=None, progress=0.0, eta=None, message=None):
+    return {"state": state, "title": title, "progress": progress, "eta": eta, "message": message}
+
+
+def _unavailable_result(error):
+    log(str(error), xbmc.LOGWARNING)
+    return {
+        "status": "error",
+        "message": str(error),
+        "available": False,
+        "data": None,
+    }
+
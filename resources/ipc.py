@@ -0,0 +1,128 @@
+import json
+import socket
+import socketserver
+import threading
+import uuid
+
+import xbmc
+import xbmcgui
+import models
+from utils import log
+
+# The service publishes its port and a per-session token on the home window,
+# which every plugin invocation in the same Kodi instance can read.
+HOME_WINDOW_ID = 10000
+PORT_PROPERTY = "helparr.service.port"
+TOKEN_PROPERTY = "helparr.service.token"
+
+CONNECT_TIMEOUT = 0.5
+MAX_MESSAGE = 1024 * 1024
+
+
+class ServiceTimeout(Exception):
+    """
+    The service took a request but did not answer in time. It may still be
+    working on it, so the caller must not repeat the work itself.
+    """
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            line = self.rfile.readline(MAX_MESSAGE)
+            message = json.loads(line)
+            if message.get("token") != self.server.token:
+                raise Exception("Invalid token")
+            result = self.server.dispatch(message["method"], message.get("params") or {})
+            response = {"ok": True, "result": result}
+        except Exception as e:
+            log(f"IPC request failed: {e}", xbmc.LOGERROR)
+            response = {"ok": False, "error": str(e)}
+        self.wfile.write(json.dumps(response, default=models.encode).encode("utf-8") + b"\n")
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class IPCServer:
+    """
+    Line-delimited JSON RPC over a loopback socket.
+
+    dispatch(method, params) is called on a worker thread for every request
+    and must return a JSON serialisable result.
+    """
+
+    def __init__(self, dispatch):
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.dispatch = dispatch
+        self._server.token = uuid.uuid4().hex
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        window = xbmcgui.Window(HOME_WINDOW_ID)
+        window.setProperty(TOKEN_PROPERTY, self._server.token)
+        window.setProperty(PORT_PROPERTY, str(self._server.server_address[1]))
+        log(f"IPC listening on port {self._server.server_address[1]}", xbmc.LOGDEBUG)
+
+    def stop(self):
+        window = xbmcgui.Window(HOME_WINDOW_ID)
+        window.clearProperty(PORT_PROPERTY)
+        window.clearProperty(TOKEN_PROPERTY)
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def call(method, params=None, timeout=30):
+    """
+    Send a request to the background service.
+    Returns the result, or None if the service is not running or failed, in
+    which case the caller should do the work itself. Raises ServiceTimeout
+    if the service took the request but did not answer within timeout.
+    """
+    window = xbmcgui.Window(HOME_WINDOW_ID)
+    port = window.getProperty(PORT_PROPERTY)
+    if not port:
+        return None
+
+    message = {
+        "token": window.getProperty(TOKEN_PROPERTY),
+        "method": method,
+        "params": params or {},
+    }
+    try:
+        sock = socket.create_connection(("127.0.0.1", int(port)), CONNECT_TIMEOUT)
+    except Exception as e:
+        log(f"Service unavailable, handling request locally: {e}", xbmc.LOGDEBUG)
+        return None
+    with sock:
+        try:
+            sock.settimeout(timeout)
+            sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as f:
+                response = json.loads(f.readline(MAX_MESSAGE))
+        except socket.timeout:
+            raise ServiceTimeout(f"The service did not answer {method} within {timeout}s.")
+        except Exception as e:
+            log(f"Service failed, handling request locally: {e}", xbmc.LOGWARNING)
+            return None
+
+    if not response.get("ok"):
+        log(f"Service error, handling request locally: {response.get('error')}", xbmc.LOGWARNING)
+        return None
+    return response["result"]
+
+
+def post(method, params=None, timeout=30):
+    """
+    Hand the service a request it carries on with by itself (drain, reload,
+    watch_progress). Like call, but a late answer counts as taken, so the
+    caller only does the work itself when None is returned.
+    """
+    try:
+        return call(method, params, timeout=timeout)
+    except ServiceTimeout as e:
+        log(f"{e} Assuming it is in progress.", xbmc.LOGWARNING)
+        return True
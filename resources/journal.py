@@ -0,0 +1,264 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+
+import xbmc
+import xbmcaddon
+from utils import log, notify
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS requests (
+    key TEXT PRIMARY KEY,
+    method TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    last_error TEXT,
+    title TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS requests_due ON requests (status, next_attempt);
+"""
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Retry schedule: BACKOFF_BASE * 2^attempts seconds (+/- 20% jitter), capped
+# at BACKOFF_MAX, giving up after MAX_ATTEMPTS.
+BACKOFF_BASE = 30
+BACKOFF_MAX = 60 * 60
+MAX_ATTEMPTS = 8
+# A claimed entry whose worker died is picked up again after this long.
+LEASE = 5 * 60
+# The rest of a series added with targeted search is searched this long
+# after the requested episode, so that one is grabbed first.
+SERIES_SEARCH_DELAY = 10 * 60
+
+
+def request_key(method, params):
+    """
+    Identity of a request, so submitting the same title twice is idempotent.
+    """
+    values = [params.get(k) for k in ("tmdb_id", "season", "episode")]
+    if params.get("episodes"):
+        values.append(",".join(f"{s}x{e}" for s, e in params["episodes"]))
+    return ":".join([method] + ["" if v is None else str(v) for v in values])
+
+
+class Journal:
+    """
+    Durable on-disk queue of requests waiting to be submitted to
+    Radarr/Sonarr, so a play can resolve immediately regardless of how slow
+    (or offline) the backend is.
+    """
+
+    def __init__(self, path):
+        folder = os.path.dirname(path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def enqueue(self, method, params, title=None, delay=0):
+        """
+        Queue a request, due in delay seconds. Re-submitting a request that
+        is already waiting is a no-op; finished or failed ones are queued
+        again.
+        Returns True if the request was (re)queued.
+        """
+        key = request_key(method, params)
+        now = time.time()
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT status FROM requests WHERE key = ?", (key,)
+            ).fetchone()
+            if row and row["status"] in (PENDING, RUNNING):
+                return False
+            self._db.execute(
+                "INSERT OR REPLACE INTO requests "
+                "(key, method, params, status, attempts, next_attempt, last_error, "
+                "title, created, updated) VALUES (?, ?, ?, ?, 0, ?, NULL, ?, ?, ?)",
+                (key, method, json.dumps(params), PENDING, now + delay, title, now, now),
+            )
+        return True
+
+    def claim(self, limit=10):
+        """
+        Atomically take up to limit due entries for submission.
+        """
+        now = time.time()
+        with self._lock, self._db:
+            rows = self._db.execute(
+                "SELECT * FROM requests WHERE status IN (?, ?) AND next_attempt <= ? "
+                "ORDER BY next_attempt LIMIT ?",
+                (PENDING, RUNNING, now, limit),
+            ).fetchall()
+            claimed = []
+            for row in rows:
+                cur = self._db.execute(
+                    "UPDATE requests SET status = ?, next_attempt = ?, updated = ? "
+                    "WHERE key = ? AND status = ? AND next_attempt = ?",
+                    (RUNNING, now + LEASE, now, row["key"], row["status"], row["next_attempt"]),
+                )
+                if cur.rowcount:
+                    claimed.append(dict(row))
+        return claimed
+
+    def complete(self, key, title=None):
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE requests SET status = ?, title = COALESCE(?, title), "
+                "last_error = NULL, updated = ? WHERE key = ?",
+                (DONE, title, now, key),
+            )
+
+    def fail(self, key, error):
+        """
+        Record a failed attempt and schedule the next one with exponential
+        backoff, or mark the entry failed once attempts run out.
+        Returns True if the entry will be retried.
+        """
+        now = time.time()
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT attempts FROM requests WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                return False
+            attempts = row["attempts"] + 1
+            retry = attempts < MAX_ATTEMPTS
+            delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+            delay *= random.uniform(0.8, 1.2)
+            self._db.execute(
+                "UPDATE requests SET status = ?, attempts = ?, next_attempt = ?, "
+                "last_error = ?, updated = ? WHERE key = ?",
+                (PENDING if retry else FAILED, attempts, now + delay, str(error), now, key),
+            )
+        return retry
+
+    def next_due(self):
+        """
+        Seconds until the next pending entry is due, or None if none are.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT MIN(next_attempt) FROM requests WHERE status IN (?, ?)",
+                (PENDING, RUNNING),
+            ).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def entries(self, statuses=(PENDING, RUNNING, FAILED, DONE)):
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT * FROM requests WHERE status IN ({', '.join('?' * len(statuses))}) "
+                "ORDER BY updated DESC",
+                tuple(statuses),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def retry_failed(self):
+        now = time.time()
+        with self._lock, self._db:
+            return self._db.execute(
+                "UPDATE requests SET status = ?, attempts = 0, next_attempt = ?, "
+                "updated = ? WHERE status = ?",
+                (PENDING, now, now, FAILED),
+            ).rowcount
+
+    def clear_finished(self):
+        with self._lock, self._db:
+            return self._db.execute(
+                "DELETE FROM requests WHERE status = ?", (DONE,)
+            ).rowcount
+
+
+def drain(journal, client, on_result=None):
+    """
+    Submit every due journal entry through client.
+    on_result(entry, result) is called for every entry that is finished,
+    either submitted or failed for good.
+    Returns the number of entries processed.
+    """
+    processed = 0
+    while True:
+        batch = journal.claim()
+        if not batch:
+            return processed
+        for entry in batch:
+            processed += 1
+            params = json.loads(entry["params"])
+            try:
+                result = getattr(client, entry["method"])(**params)
+            except Exception as e:
+                result = {"status": "error", "message": str(e)}
+
+            if result.get("status") == "error":
+                retry = journal.fail(entry["key"], result.get("message"))
+                log(
+                    f"Queued request {entry['key']} failed "
+                    f"({'will retry' if retry else 'giving up'}): {result.get('message')}",
+                    xbmc.LOGWARNING,
+                )
+                if not retry and on_result:
+                    on_result(entry, result)
+                continue
+
+            data = result.get("data") or {}
+            journal.complete(entry["key"], title=data.get("title"))
+            if on_result:
+                on_result(entry, result)
+            # Picked up by the next claim of this loop
+            queue_search(journal, result, params)
+
+
+def queue_search(journal, result, params):
+    """
+    Journal the searches a result of a series added with targeted search
+    asks for, so they are retried until Sonarr accepts them: the requested
+    episodes (pending_search) right away, the rest of the series
+    (pending_series_search) after SERIES_SEARCH_DELAY.
+    Returns True if one was queued.
+    """
+    if isinstance(result, list):
+        # request_episodes answers per episode, every one with the add's result
+        result = result[0] if result else {}
+    queued = False
+    if result.get("pending_search"):
+        queued = journal.enqueue(
+            "search_episodes",
+            {"tmdb_id": params["tmdb_id"], "episodes": result["pending_search"]},
+        )
+    if result.get("pending_series_search"):
+        queued = (
+            journal.enqueue(
+                "search_series", {"tmdb_id": params["tmdb_id"]}, delay=SERIES_SEARCH_DELAY
+            )
+            or queued
+        )
+    return queued
+
+
+def notify_result(entry, result):
+    """
+    Default drain callback: tell the user how a queued request ended.
+    """
+    icon = xbmcaddon.Addon().getAddonInfo("icon")
+    if result.get("status") == "error":
+        notify(f"Request failed: {result.get('message')}", icon=icon, time=5000)
+    else:
+        notify(result.get("message", ""), icon=icon, time=5000)
@@ -0,0 +1,164 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import xbmc
+from utils import log
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS movies (
+    tmdb_id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shows (
+    tvshowid INTEGER PRIMARY KEY,
+    tmdb_id INTEGER,
+    tvdb_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS shows_tmdb ON shows (tmdb_id);
+CREATE INDEX IF NOT EXISTS shows_tvdb ON shows (tvdb_id);
+CREATE TABLE IF NOT EXISTS episodes (
+    tvshowid INTEGER NOT NULL,
+    season INTEGER NOT NULL,
+    episode INTEGER NOT NULL,
+    file TEXT NOT NULL,
+    PRIMARY KEY (tvshowid, season, episode)
+) WITHOUT ROWID;
+"""
+
+# Items are fetched from Kodi in pages of this size, so building the index
+# for a large library never holds the whole JSON-RPC response at once.
+PAGE_SIZE = 2000
+
+
+class KodiLibraryIndex:
+    """
+    Index of Kodi's own video library by TMDb (and TVDB) id.
+
+    Kodi's JSON-RPC cannot filter by uniqueid, so the background service
+    copies the movie, show and episode ids and files here when it starts
+    and after every library scan or clean. A play request for a title that
+    is already in the library is then answered with one local query,
+    without asking Radarr or Sonarr.
+    """
+
+    def __init__(self, path):
+        folder = os.path.dirname(path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def built_at(self):
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'built'").fetchone()
+        return float(row[0]) if row else 0.0
+
+    # ----------------------------------------------------------------------
+    # Lookups
+    # ----------------------------------------------------------------------
+    def get_movie(self, tmdb_id):
+        """
+        Return the file of a movie in Kodi's library, or None.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT file FROM movies WHERE tmdb_id = ?", (int(tmdb_id),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_episode(self, tmdb_id, season, episode, tvdb_id=None):
+        """
+        Return the file of an episode in Kodi's library, or None. Shows
+        scraped without a TMDb id are matched on their TVDB id.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT e.file FROM shows s JOIN episodes e ON e.tvshowid = s.tvshowid "
+                "WHERE (s.tmdb_id = ? OR s.tvdb_id = ?) AND e.season = ? AND e.episode = ? "
+                "LIMIT 1",
+                (int(tmdb_id), int(tvdb_id or -1), int(season), int(episode)),
+            ).fetchone()
+        return row[0] if row else None
+
+    # ----------------------------------------------------------------------
+    # Build
+    # ----------------------------------------------------------------------
+    def rebuild(self):
+        """
+        Replace the index with the current content of Kodi's library.
+        Returns (movies, episodes) indexed.
+        """
+        movies = [
+            (tmdb_id, item["file"])
+            for item in _items("VideoLibrary.GetMovies", "movies", ["uniqueid", "file"])
+            for tmdb_id in [_unique_id(item, "tmdb")]
+            if tmdb_id and item.get("file")
+        ]
+        shows = [
+            (item["tvshowid"], _unique_id(item, "tmdb"), _unique_id(item, "tvdb"))
+            for item in _items("VideoLibrary.GetTVShows", "tvshows", ["uniqueid"])
+        ]
+        episodes = [
+            (item["tvshowid"], item["season"], item["episode"], item["file"])
+            for item in _items(
+                "VideoLibrary.GetEpisodes",
+                "episodes",
+                ["tvshowid", "season", "episode", "file"],
+            )
+            if item.get("file")
+        ]
+
+        with self._lock, self._db:
+            for table in ("movies", "shows", "episodes"):
+                self._db.execute(f"DELETE FROM {table}")
+            self._db.executemany("INSERT OR REPLACE INTO movies VALUES (?, ?)", movies)
+            self._db.executemany("INSERT OR REPLACE INTO shows VALUES (?, ?, ?)", shows)
+            self._db.executemany("INSERT OR REPLACE INTO episodes VALUES (?, ?, ?, ?)", episodes)
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('built', ?)", (str(time.time()),)
+            )
+        log(f"Kodi library index: {len(movies)} movies, {len(episodes)} episodes.", xbmc.LOGDEBUG)
+        return len(movies), len(episodes)
+
+
+def _items(method, key, properties):
+    """
+    Yield every item of a VideoLibrary listing, one page at a time.
+    """
+    start = 0
+    while True:
+        request = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": method,
+            "params": {"properties": properties, "limits": {"start": start, "end": start + PAGE_SIZE}},
+        }
+        response = json.loads(xbmc.executeJSONRPC(json.dumps(request)))
+        if "error" in response:
+            raise Exception(f"{method} failed: {response['error'].get('message')}")
+        result = response.get("result") or {}
+        items = result.get(key) or []
+        yield from items
+        start += len(items)
+        total = (result.get("limits") or {}).get("total", 0)
+        if not items or start >= total:
+            return
+
+
+def _unique_id(item, provider):
+    value = (item.get("uniqueid") or {}).get(provider)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
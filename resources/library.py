@@ -0,0 +1,262 @@
+import os
+import sqlite3
+import threading
+import time
+
+import xbmc
+from models import Movie, Series
+from utils import log
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS movies (
+    host TEXT NOT NULL,
+    tmdb_id INTEGER NOT NULL,
+    id INTEGER NOT NULL,
+    title TEXT,
+    has_file INTEGER,
+    monitored INTEGER,
+    PRIMARY KEY (host, tmdb_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS series (
+    host TEXT NOT NULL,
+    tmdb_id INTEGER NOT NULL,
+    id INTEGER NOT NULL,
+    tvdb_id INTEGER,
+    title TEXT,
+    monitored INTEGER,
+    episode_file_count INTEGER,
+    episode_count INTEGER,
+    percent REAL,
+    PRIMARY KEY (host, tmdb_id)
+) WITHOUT ROWID;
+"""
+
+MOVIE_COLUMNS = ("id", "title", "has_file", "monitored")
+SERIES_COLUMNS = (
+    "id",
+    "tvdb_id",
+    "title",
+    "monitored",
+    "episode_file_count",
+    "episode_count",
+    "percent",
+)
+
+
+class LibraryIndex:
+    """
+    Local mirror of the Radarr movie and Sonarr series libraries, keyed by
+    TMDb ID, so "is this already monitored/available?" can be answered
+    without a network call.
+
+    Rows hold only the handful of columns the request workflows read, which
+    keeps a 10k+ movie library to a few hundred KB of SQLite.
+    """
+
+    def __init__(self, path):
+        folder = os.path.dirname(path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    # ----------------------------------------------------------------------
+    # Bookkeeping
+    # ----------------------------------------------------------------------
+    def _get_meta(self, key):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._db.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value))
+        )
+
+    def validate(self, signature):
+        """
+        Wipe the index if it was built under different backend settings.
+        """
+        with self._lock, self._db:
+            if self._get_meta("signature") == signature:
+                return
+            self._db.execute("DELETE FROM movies")
+            self._db.execute("DELETE FROM series")
+            self._db.execute("DELETE FROM meta")
+            self._set_meta("signature", signature)
+
+    def synced_at(self, host, kind):
+        with self._lock:
+            value = self._get_meta(f"synced|{kind}|{host}")
+        return float(value) if value else 0.0
+
+    def age(self, host, kind):
+        return time.time() - self.synced_at(host, kind)
+
+    def invalidate(self, host=None):
+        """
+        Mark the index stale so the next refresh pulls it again.
+        """
+        with self._lock, self._db:
+            if host:
+                self._db.execute("DELETE FROM meta WHERE key LIKE ?", (f"synced|%|{host}",))
+            else:
+                self._db.execute("DELETE FROM meta WHERE key LIKE 'synced|%'")
+
+    # ----------------------------------------------------------------------
+    # Lookups
+    # ----------------------------------------------------------------------
+    def get_movie(self, host, tmdb_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, title, has_file, monitored FROM movies "
+                "WHERE host = ? AND tmdb_id = ?",
+                (host, int(tmdb_id)),
+            ).fetchone()
+        if not row:
+            return None
+        return Movie(
+            id=row[0],
+            tmdb_id=int(tmdb_id),
+            title=row[1],
+            has_file=bool(row[2]),
+            monitored=bool(row[3]),
+            host=host,
+        )
+
+    def get_series(self, host, tmdb_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, tvdb_id, title, monitored, episode_file_count, "
+                "episode_count, percent FROM series WHERE host = ? AND tmdb_id = ?",
+                (host, int(tmdb_id)),
+            ).fetchone()
+        if not row:
+            return None
+        return Series(
+            id=row[0],
+            tmdb_id=int(tmdb_id),
+            tvdb_id=row[1],
+            title=row[2],
+            monitored=bool(row[3]),
+            statistics={
+                "episodeFileCount": row[4],
+                "episodeCount": row[5],
+                "percentOfEpisodes": row[6],
+            },
+            host=host,
+        )
+
+    def tmdb_for_tvdb(self, tvdb_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT tmdb_id FROM series WHERE tvdb_id = ? LIMIT 1", (int(tvdb_id),)
+            ).fetchone()
+        return row[0] if row else None
+
+    # ----------------------------------------------------------------------
+    # Updates
+    # ----------------------------------------------------------------------
+    # Applied from webhook events, which do not say which instance sent
+    # them; rows are matched on both the TMDb and the instance's own id.
+    def update_movie(self, tmdb_id, movie_id, has_file):
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE movies SET has_file = ? WHERE tmdb_id = ? AND id = ?",
+                (int(bool(has_file)), int(tmdb_id), int(movie_id)),
+            )
+
+    def remove_movie(self, tmdb_id, movie_id):
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM movies WHERE tmdb_id = ? AND id = ?", (int(tmdb_id), int(movie_id))
+            )
+
+    def remove_series(self, series_id, tvdb_id):
+        """
+        Drop a series whose statistics changed, so lookups ask Sonarr until
+        the next sync brings it back.
+        """
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM series WHERE id = ? AND tvdb_id = ?", (int(series_id), int(tvdb_id))
+            )
+
+    # ----------------------------------------------------------------------
+    # Sync
+    # ----------------------------------------------------------------------
+    def sync_movies(self, host, movies):
+        """
+        Incrementally apply a full /api/v3/movie listing, given as any
+        iterable of movie dicts so a streamed response can be passed as is.
+        Returns the number of rows inserted, updated or removed.
+        """
+        rows = {}
+        for m in movies:
+            if m.get("tmdbId"):
+                rows[m["tmdbId"]] = (
+                    m["id"],
+                    m.get("title"),
+                    int(bool(m.get("hasFile"))),
+                    int(bool(m.get("monitored"))),
+                )
+        return self._sync("movies", MOVIE_COLUMNS, host, rows)
+
+    def sync_series(self, host, series):
+        """
+        Incrementally apply a full /api/v3/series listing, given as any
+        iterable of series dicts.
+        Returns the number of rows inserted, updated or removed.
+        """
+        rows = {}
+        for s in series:
+            if s.get("tmdbId"):
+                stats = s.get("statistics") or {}
+                rows[s["tmdbId"]] = (
+                    s["id"],
+                    s.get("tvdbId"),
+                    s.get("title"),
+                    int(bool(s.get("monitored"))),
+                    stats.get("episodeFileCount", 0),
+                    stats.get("episodeCount", 0),
+                    stats.get("percentOfEpisodes", 0),
+                )
+        return self._sync("series", SERIES_COLUMNS, host, rows)
+
+    def _sync(self, table, columns, host, rows):
+        select = f"SELECT tmdb_id, {', '.join(columns)} FROM {table} WHERE host = ?"
+        upsert = (
+            f"INSERT OR REPLACE INTO {table} (host, tmdb_id, {', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * (len(columns) + 2))})"
+        )
+        with self._lock, self._db:
+            existing = {
+                r[0]: tuple(r[1:]) for r in self._db.execute(select, (host,))
+            }
+            changed = [
+                (host, tmdb_id) + values
+                for tmdb_id, values in rows.items()
+                if existing.get(tmdb_id) != values
+            ]
+            removed = [(host, tmdb_id) for tmdb_id in existing if tmdb_id not in rows]
+            if changed:
+                self._db.executemany(upsert, changed)
+            if removed:
+                self._db.executemany(
+                    f"DELETE FROM {table} WHERE host = ? AND tmdb_id = ?", removed
+                )
+            self._set_meta(f"synced|{table}|{host}", time.time())
+
+        if changed or removed:
+            log(
+                f"Library index {table}: {len(changed)} updated, {len(removed)} removed.",
+                xbmc.LOGDEBUG,
+            )
+        return len(changed) + len(removed)
@@ -1,6 +1,10 @@
+import time
+
+# Taken before any other import so the startup breakdown includes them.
+STARTED = time.perf_counter()
+
 import os
 import sys
-import random
 
 import xbmc
 import xbmcaddon
@@ -13,13 +17,38 @@ addon = xbmcaddon.Addon()
 addon_dir = addon.getAddonInfo("path")
 sys.path.insert(0, os.path.join(addon_dir, "resources"))
 
-from client import MediaClient
-from utils import log, notify, PLAYER_FILENAME, install_player
+# Heavier modules (requests via the client, the IPC socket code, random) are
+# imported inside the actions that need them, so the root listing and the
+# settings action start as fast as possible.
+import stats
+from utils import (
+    log,
+    notify,
+    PLAYER_FILENAME,
+    Timer,
+    format_duration,
+    install_player,
+    build_client,
+    get_cache,
+    get_journal,
+    get_kodi_library,
+    get_library,
+    get_single_flight,
+    prefetch_episodes,
+    profile_path,
+    request_budget,
+)
+
+# Placeholder videos shipped in resources/images, precomputed so a play does
+# not have to list the directory.
+PLACEHOLDER_VIDEOS = ("downloading-dummy.mp4",)
+
+timer = Timer(STARTED)
 
 
 def main():
-    # Ensure player file is installed/updated
-    install_player()
+    timer.mark("imports")
+    stats.configure(addon.getSettingBool("diagnostics"), profile_path("stats.json"))
 
     url = sys.argv[0]
     try:
@@ -41,10 +70,51 @@ def main():
     action = params.get("action")
 
     log(f"Action: {action}, Params: {params}")
+    timer.mark("parse")
+
+    try:
+        run(url, handle, params)
+    finally:
+        timer.log_summary("Startup")
+        for stage, elapsed in timer.stages:
+            stats.record(f"plugin {action or 'root'} {stage}", elapsed)
+        stats.flush()
+
+
+def run(url, handle, params):
+    action = params.get("action")
+
+    # Ensure player file is installed/updated
+    install_player()
+    timer.mark("install_player")
 
     if not action:
         # Root listing
 
+        # Radarr/Sonarr download queues
+        li_downloads = xbmcgui.ListItem(label="Downloads")
+        li_downloads.setArt({"icon": "DefaultAddonsUpdates.png"})
+        xbmcplugin.addDirectoryItem(
+            handle=handle, url=url + "?action=downloads", listitem=li_downloads, isFolder=True
+        )
+
+        # Queued requests (fire-and-forget mode)
+        li_requests = xbmcgui.ListItem(label="Queued Requests")
+        li_requests.setArt({"icon": "DefaultAddonsUpdates.png"})
+        xbmcplugin.addDirectoryItem(
+            handle=handle, url=url + "?action=journal", listitem=li_requests, isFolder=True
+        )
+
+        # Diagnostics
+        li_diagnostics = xbmcgui.ListItem(label="Diagnostics")
+        li_diagnostics.setArt({"icon": "DefaultAddonInfoProvider.png"})
+        xbmcplugin.addDirectoryItem(
+            handle=handle,
+            url=url + "?action=diagnostics",
+            listitem=li_diagnostics,
+            isFolder=True,
+        )
+
         # Item 4: Settings
         li_settings = xbmcgui.ListItem(label="Settings")
         li_settings.setArt({"icon": "DefaultAddon.png"})
@@ -60,39 +130,145 @@ def main():
         addon.openSettings()
         return
 
+    if action == "downloads":
+        list_downloads(handle, url, int(params.get("page", 1)))
+        return
+
+    if action == "journal":
+        list_journal(handle, url)
+        return
+
+    if action in ("journal_retry", "journal_clear"):
+        import ipc
+
+        journal = get_journal()
+        try:
+            if action == "journal_retry":
+                journal.retry_failed()
+            else:
+                journal.clear_finished()
+        finally:
+            journal.close()
+        if action == "journal_retry":
+            ipc.post("drain")
+        xbmc.executebuiltin("Container.Refresh")
+        return
+
+    if action == "diagnostics":
+        list_diagnostics(handle, url)
+        return
+
+    if action == "diagnostics_export":
+        export_diagnostics()
+        return
+
+    if action == "diagnostics_reset":
+        stats.reset(profile_path("stats.json"))
+        xbmc.executebuiltin("Container.Refresh")
+        return
+
+    if action == "refresh_cache":
+        import ipc
+
+        get_cache().clear()
+        get_cache("episodes").clear()
+        get_cache("prefetch").clear()
+        get_cache("queue").clear()
+        get_cache("ids").clear()
+        get_cache("lookup").clear()
+        get_cache("breaker").clear()
+        library = get_library()
+        if library is not None:
+            library.invalidate()
+            library.close()
+        ipc.post("reload")
+        ipc.post("rebuild_kodi_library")
+        notify("Cache cleared", icon=addon.getAddonInfo("icon"), time=3000)
+        return
+
     # Handle Main Play Action
     if action == "play":
         tmdb_id = params.get("tmdb_id")
         media_type = params.get("type", "movie")
         season = params.get("season")
         episode = params.get("episode")
-        handle_play_request(handle, tmdb_id, media_type, season, episode)
+        # Older player files do not pass it; unfilled placeholders stay as is
+        tvdb_id = params.get("tvdb_id")
+        if not (tvdb_id or "").isdigit():
+            tvdb_id = None
+        handle_play_request(handle, tmdb_id, media_type, season, episode, tvdb_id)
+
+    # Handle batch requests (e.g. from TMDb Helper context menus)
+    if action == "batch":
+        handle_batch_request(params)
 
 
-def handle_play_request(handle, tmdb_id, media_type, season=None, episode=None):
+def handle_play_request(handle, tmdb_id, media_type, season=None, episode=None, tvdb_id=None):
+    import ipc
+    from journal import request_key
+
     if not tmdb_id:
         notify("Missing TMDB ID", icon=xbmcgui.NOTIFICATION_ERROR)
         xbmcplugin.setResolvedUrl(handle, False, xbmcgui.ListItem())
         return
 
-    radarr_url = addon.getSetting("radarr_url")
-    radarr_key = addon.getSetting("radarr_key")
-    sonarr_url = addon.getSetting("sonarr_url")
-    sonarr_key = addon.getSetting("sonarr_key")
-
-    client = MediaClient(radarr_url, radarr_key, sonarr_url, sonarr_key)
     icon = addon.getAddonInfo("icon")
+    client = None
+    result = {}
+
+    # Titles already in Kodi's library are played from there, without
+    # asking Radarr/Sonarr
+    local_file = find_in_kodi_library(tmdb_id, media_type, season, episode, tvdb_id)
+    timer.mark("kodi_library")
+    if local_file and not xbmcvfs.exists(local_file):
+        # Deleted or unreachable since the index was built; the backends
+        # know whether it is coming back
+        log(f"Kodi library file is missing, checking backends: {local_file}", xbmc.LOGWARNING)
+        local_file = None
+    if local_file:
+        log(f"Found in Kodi library: {local_file}")
+        notify("Playing from library", icon=icon, time=2000)
+        xbmcplugin.setResolvedUrl(handle, True, xbmcgui.ListItem(path=local_file))
+        return
 
     notify("Checking...", icon=icon, time=2000)
 
     try:
         if media_type == "tv" or media_type == "episode":
             # Pass season and episode integers if available
-            s_val = int(season) if season else None
-            e_val = int(episode) if episode else None
-            result = client.request_series(tmdb_id, season=s_val, episode=e_val)
+            method = "request_series"
+            params = {
+                "tmdb_id": tmdb_id,
+                "season": int(season) if season else None,
+                "episode": int(episode) if episode else None,
+            }
+            if tvdb_id:
+                params["tvdb_id"] = int(tvdb_id)
         else:
-            result = client.request_movie(tmdb_id)
+            method = "request_movie"
+            params = {"tmdb_id": tmdb_id}
+
+        if addon.getSettingBool("async_requests"):
+            queue_play_request(handle, method, params, icon)
+            return
+
+        def submit():
+            nonlocal client
+            # Prefer the warm background service, fall back to doing it here.
+            # The service is given as long as the request may take, so a slow
+            # backend is not asked twice.
+            result = ipc.call(method, params, timeout=request_budget())
+            timer.mark("ipc")
+            if result is None:
+                client = build_client()
+                timer.mark("build_client")
+                result = getattr(client, method)(**params)
+                timer.mark(method)
+            return result
+
+        # Repeated launches for the same title share one in-flight request
+        result = get_single_flight().do(request_key(method, params), submit)
+        timer.mark("single_flight")
 
         status = result.get("status")
         message = result.get("message", "Unknown response")
@@ -116,6 +292,9 @@ def handle_play_request(handle, tmdb_id, media_type, season=None, episode=None):
                 handle,
                 title=f"Downloading: {title}",
             )
+            if addon.getSettingBool("progress") and (method == "request_movie" or episode):
+                # Followed by the service, which outlives this invocation
+                ipc.post("watch_progress", {"params": params, "title": title}, timeout=2)
         else:
             # Error
             log(f"Play Request Error: {message}", xbmc.LOGERROR)
@@ -126,34 +305,332 @@ def handle_play_request(handle, tmdb_id, media_type, season=None, episode=None):
         log(f"Error: {e}", xbmc.LOGERROR)
         notify(f"Error: {e}", icon=icon, time=5000)
         xbmcplugin.setResolvedUrl(handle, False, xbmcgui.ListItem())
+    finally:
+        # The play request is already resolved, so prefetching upcoming
+        # episodes or refreshing a stale library index here does not delay
+        # playback.
+        if client is not None:
+            if result.get("pending_search") or result.get("pending_series_search"):
+                search_added_episode(client, result, params)
+            if season and episode:
+                prefetch_episodes(client, tmdb_id, season, episode)
+            client.refresh_library(max_age=addon.getSettingInt("library_refresh") * 60)
+            client.close()
+
+
+def find_in_kodi_library(tmdb_id, media_type, season=None, episode=None, tvdb_id=None):
+    """
+    Return the file of the requested movie or episode if Kodi's own library
+    has it, None otherwise (also for whole-show requests).
+    """
+    library = get_kodi_library()
+    if library is None:
+        return None
+    try:
+        if media_type in ("tv", "episode"):
+            if season and episode:
+                return library.get_episode(tmdb_id, season, episode, tvdb_id)
+            return None
+        return library.get_movie(tmdb_id)
+    except Exception as e:
+        log(f"Error checking Kodi library: {e}", xbmc.LOGERROR)
+        return None
+    finally:
+        library.close()
+
+
+def search_added_episode(client, result, params):
+    """
+    Journal the targeted searches for a series that was just added here,
+    and run them through the service if it is running, otherwise here.
+    """
+    import ipc
+    from journal import drain, notify_result, queue_search
+
+    journal = get_journal()
+    try:
+        if queue_search(journal, result, params) and ipc.post("drain") is None:
+            drain(journal, client, on_result=notify_result)
+    finally:
+        journal.close()
+
+
+def queue_play_request(handle, method, params, icon):
+    """
+    Fire-and-forget mode: journal the request and start the placeholder right
+    away, then submit it in the background (through the service when it is
+    running, otherwise here after playback has been resolved).
+    """
+    import ipc
+    from journal import drain, notify_result
+
+    journal = get_journal()
+    try:
+        queued = journal.enqueue(method, params)
+        notify("Request queued" if queued else "Already queued", icon=icon, time=3000)
+        play_placeholder_video(handle, title="Downloading...")
+        timer.mark("queued")
+
+        if ipc.post("drain") is None:
+            client = build_client()
+            try:
+                drain(journal, client, on_result=notify_result)
+            finally:
+                client.close()
+    finally:
+        journal.close()
+
+
+def list_downloads(handle, url, page=1):
+    """
+    One page of the Radarr/Sonarr download queues, with a link to the next
+    page while any server has more.
+    """
+    import ipc
+
+    result = ipc.call("get_queue_page", {"page": page}, timeout=request_budget())
+    timer.mark("ipc")
+    if result is None:
+        client = build_client()
+        try:
+            result = client.get_queue_page(page)
+        finally:
+            client.close()
+        timer.mark("get_queue_page")
+
+    xbmcplugin.setContent(handle, "videos")
+    for item in result["items"]:
+        label2 = f"{item.get('progress'):.0f}%"
+        if item.get("eta") is not None:
+            label2 += f", {format_duration(item.get('eta'))} left"
+        plot = [f"{item.get('instance')}: {item.get('status')}", label2]
+        if item.get("error"):
+            plot.append(item.get("error"))
+        li = xbmcgui.ListItem(label=f"[{item.get('progress'):.0f}%] {item.get('title')}", label2=label2)
+        art = {"poster": item.get("poster"), "fanart": item.get("fanart"), "thumb": item.get("poster")}
+        li.setArt({k: v for k, v in art.items() if v})
+        info = li.getVideoInfoTag()
+        info.setPlot("\n".join(plot))
+        info.setMediaType("movie" if item.get("kind") == "movie" else "episode")
+        xbmcplugin.addDirectoryItem(handle=handle, url="", listitem=li, isFolder=False)
+
+    if not result["items"] and page == 1:
+        li = xbmcgui.ListItem(label="Nothing is downloading")
+        xbmcplugin.addDirectoryItem(handle=handle, url="", listitem=li, isFolder=False)
+
+    if result["more"]:
+        li = xbmcgui.ListItem(label="Next page")
+        li.setArt({"icon": "DefaultFolder.png"})
+        xbmcplugin.addDirectoryItem(
+            handle=handle, url=url + f"?action=downloads&page={page + 1}", listitem=li, isFolder=True
+        )
+
+    # Let Kodi reuse the built listing when navigating back to this page
+    xbmcplugin.endOfDirectory(handle, cacheToDisc=True)
+
+
+def list_journal(handle, url):
+    """
+    Status view of queued, failed and recently submitted requests.
+    """
+    from journal import FAILED, DONE
+
+    journal = get_journal()
+    try:
+        entries = journal.entries()
+    finally:
+        journal.close()
+
+    now = time.time()
+    for entry in entries:
+        label = entry["title"] or entry["key"]
+        if entry["status"] == FAILED:
+            label2 = f"Failed after {entry['attempts']} attempts: {entry['last_error']}"
+        elif entry["status"] == DONE:
+            label2 = "Submitted"
+        elif entry["attempts"]:
+            wait = max(0, int(entry["next_attempt"] - now))
+            label2 = f"Retry {entry['attempts']} in {wait}s: {entry['last_error']}"
+        elif entry["next_attempt"] > now:
+            label2 = f"Due in {int(entry['next_attempt'] - now)}s"
+        else:
+            label2 = "Waiting"
+        li = xbmcgui.ListItem(label=f"[{entry['status']}] {label}", label2=label2)
+        li.getVideoInfoTag().setPlot(label2)
+        xbmcplugin.addDirectoryItem(handle=handle, url="", listitem=li, isFolder=False)
+
+    if any(e["status"] == FAILED for e in entries):
+        li = xbmcgui.ListItem(label="Retry failed requests")
+        xbmcplugin.addDirectoryItem(
+            handle=handle, url=url + "?action=journal_retry", listitem=li, isFolder=False
+        )
+    if any(e["status"] == DONE for e in entries):
+        li = xbmcgui.ListItem(label="Clear submitted requests")
+        xbmcplugin.addDirectoryItem(
+            handle=handle, url=url + "?action=journal_clear", listitem=li, isFolder=False
+        )
+
+    xbmcplugin.endOfDirectory(handle, cacheToDisc=False)
+
+
+def list_diagnostics(handle, url):
+    """
+    Per-endpoint latency, call counts, errors and cache hit ratios collected
+    over the last days.
+    """
+    summary = stats.summary(profile_path("stats.json"))
+
+    if not stats.enabled():
+        li = xbmcgui.ListItem(label="Collection is off, enable it in Settings > Advanced")
+        xbmcplugin.addDirectoryItem(handle=handle, url="", listitem=li, isFolder=False)
+
+    timings = sorted(summary["timings"].items(), key=lambda item: -item[1]["total"])
+    for name, t in timings:
+        label = (
+            f"{name}: {t['count']} calls, avg {t['avg']:.0f}ms, "
+            f"p95 <{t['p95']:.0f}ms, max {t['max']:.0f}ms"
+        )
+        if t["errors"]:
+            label += f", {t['errors']} errors"
+        li = xbmcgui.ListItem(label=label)
+        xbmcplugin.addDirectoryItem(handle=handle, url="", listitem=li, isFolder=False)
+
+    counters = summary["counters"]
+    ratios = {}
+    for name, n in counters.items():
+        base, _, outcome = name.rpartition(" ")
+        if outcome in ("hit", "miss"):
+            ratios.setdefault(base, {"hit": 0, "miss": 0})[outcome] = n
+    for base, r in sorted(ratios.items()):
+        total = r["hit"] + r["miss"]
+        li = xbmcgui.ListItem(
+            label=f"{base}: {r['hit']}/{total} hits ({r['hit'] * 100 // total}%)"
+        )
+        xbmcplugin.addDirectoryItem(handle=handle, url="", listitem=li, isFolder=False)
+    for name, n in sorted(counters.items()):
+        if name.rpartition(" ")[2] not in ("hit", "miss"):
+            li = xbmcgui.ListItem(label=f"{name}: {n}")
+            xbmcplugin.addDirectoryItem(handle=handle, url="", listitem=li, isFolder=False)
+
+    for label, action in (
+        ("Export to JSON", "diagnostics_export"),
+        ("Reset statistics", "diagnostics_reset"),
+    ):
+        li = xbmcgui.ListItem(label=label)
+        xbmcplugin.addDirectoryItem(
+            handle=handle, url=f"{url}?action={action}", listitem=li, isFolder=False
+        )
+
+    xbmcplugin.endOfDirectory(handle, cacheToDisc=False)
+
+
+def export_diagnostics():
+    """
+    Write the aggregated statistics to a JSON file in a folder the user picks
+    (addon_data if they cancel).
+    """
+    import json
+
+    folder = xbmcgui.Dialog().browse(3, "Export diagnostics", "files")
+    if not folder:
+        folder = profile_path()
+    path = os.path.join(
+        xbmcvfs.translatePath(folder), time.strftime("helparr-diagnostics-%Y%m%d-%H%M%S.json")
+    )
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(stats.summary(profile_path("stats.json")), f, indent=2, sort_keys=True)
+    except Exception as e:
+        log(f"Error exporting diagnostics: {e}", xbmc.LOGERROR)
+        notify(f"Export failed: {e}", icon=xbmcgui.NOTIFICATION_ERROR)
+        return
+    notify(f"Exported to {path}", icon=addon.getAddonInfo("icon"), time=5000)
+
+
+def handle_batch_request(params):
+    """
+    Request several titles in one operation:
+      ?action=batch&type=movie&tmdb_ids=603,604,605
+      ?action=batch&type=season&tmdb_id=1399&season=2
+      ?action=batch&type=episode&tmdb_id=1399&episodes=2x1,2x2
+    """
+    from urllib.parse import unquote
+
+    import ipc
+
+    icon = addon.getAddonInfo("icon")
+    media_type = params.get("type", "movie")
+    tmdb_id = params.get("tmdb_id")
+
+    try:
+        if media_type == "season":
+            method = "request_season"
+            args = {"tmdb_id": tmdb_id, "season": int(params["season"])}
+        elif media_type in ("episode", "episodes"):
+            method = "request_episodes"
+            args = {
+                "tmdb_id": tmdb_id,
+                "episodes": [
+                    [int(n) for n in pair.lower().split("x", 1)]
+                    for pair in unquote(params.get("episodes", "")).split(",")
+                    if pair
+                ],
+            }
+        else:
+            method = "request_movies"
+            args = {
+                "tmdb_ids": [t for t in unquote(params.get("tmdb_ids", "")).split(",") if t]
+            }
+    except Exception as e:
+        log(f"Invalid batch request {params}: {e}", xbmc.LOGERROR)
+        notify("Invalid batch request", icon=xbmcgui.NOTIFICATION_ERROR)
+        return
+
+    notify("Checking...", icon=icon, time=2000)
+
+    client = None
+    try:
+        result = ipc.call(method, args, timeout=request_budget() * 2)
+        if result is None:
+            client = build_client()
+            result = getattr(client, method)(**args)
+            if method != "request_movies":
+                search_added_episode(client, result, args)
+    except Exception as e:
+        log(f"Error: {e}", xbmc.LOGERROR)
+        notify(f"Error: {e}", icon=icon, time=5000)
+        return
+    finally:
+        if client is not None:
+            client.close()
+
+    results = result if isinstance(result, list) else [result]
+    counts = {}
+    for r in results:
+        counts[r.get("status")] = counts.get(r.get("status"), 0) + 1
+    for r in results:
+        if r.get("status") == "error":
+            log(f"Batch Request Error: {r.get('message')}", xbmc.LOGERROR)
+
+    if len(results) == 1:
+        summary = results[0].get("message", "Unknown response")
+    else:
+        summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+    notify(summary, icon=icon, time=5000)
 
 
 def play_placeholder_video(
     handle,
     title="Downloading...",
 ):
-    images_dir = os.path.join(addon_dir, "resources", "images")
-    video_path = None
+    import random
 
-    if os.path.exists(images_dir):
-        try:
-            files = os.listdir(images_dir)
-
-            # Filter files that start with "downloading" and end with ".mp4"
-            candidates = [
-                f for f in files if f.startswith("downloading") and f.endswith(".mp4")
-            ]
-
-            if candidates:
-                selected = random.choice(candidates)
-                video_path = os.path.join(images_dir, selected)
-        except Exception as e:
-            log(f"Error listing files: {e}", xbmc.LOGERROR)
-    else:
-        log(f"Images directory does not exist: {images_dir}", xbmc.LOGERROR)
+    selected = random.choice(PLACEHOLDER_VIDEOS)
+    video_path = os.path.join(addon_dir, "resources", "images", selected)
 
-    if not video_path:
+    if not os.path.exists(video_path):
         # Don't worry about it, we'll still notify
+        log(f"Placeholder video does not exist: {video_path}", xbmc.LOGERROR)
         return
 
     log(f"Playing video: {video_path}")
@@ -0,0 +1,322 @@
+import codecs
+import json
+
+# Fields that make up a season's "version": it changes whenever Sonarr's
+# statistics for the season change (new episodes, downloaded files, airings).
+SEASON_VERSION_FIELDS = (
+    "episodeFileCount",
+    "episodeCount",
+    "totalEpisodeCount",
+    "sizeOnDisk",
+    "previousAiring",
+)
+
+
+class Record:
+    """
+    Compact, slotted projection of a Radarr/Sonarr resource holding only
+    the fields the request workflows use.
+
+    FIELDS maps attribute names to API field names. get() gives dict-style
+    access by API field name, so callers can treat records and the plain
+    dicts that come back over IPC alike.
+    """
+
+    __slots__ = ()
+    FIELDS = {}
+
+    def __init__(self, **values):
+        for attr in self.__slots__:
+            setattr(self, attr, values.get(attr))
+
+    @classmethod
+    def from_api(cls, data):
+        return cls(**{attr: data.get(key) for attr, key in cls.FIELDS.items()})
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuild a record from to_dict() output.
+        """
+        return cls.from_api(data)
+
+    def to_dict(self):
+        return {key: getattr(self, attr) for attr, key in self.FIELDS.items()}
+
+    def get(self, key, default=None):
+        for attr, api_key in self.FIELDS.items():
+            if api_key == key:
+                value = getattr(self, attr)
+                return default if value is None else value
+        return default
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Movie(Record):
+    __slots__ = ("id", "tmdb_id", "title", "year", "has_file", "monitored", "host")
+    FIELDS = {
+        "id": "id",
+        "tmdb_id": "tmdbId",
+        "title": "title",
+        "year": "year",
+        "has_file": "hasFile",
+        "monitored": "monitored",
+        "host": "host",
+    }
+
+
+class Episode(Record):
+    __slots__ = (
+        "id",
+        "series_id",
+        "season_number",
+        "episode_number",
+        "title",
+        "has_file",
+        "monitored",
+    )
+    FIELDS = {
+        "id": "id",
+        "series_id": "seriesId",
+        "season_number": "seasonNumber",
+        "episode_number": "episodeNumber",
+        "title": "title",
+        "has_file": "hasFile",
+        "monitored": "monitored",
+    }
+
+
+class Series(Record):
+    """
+    Series projection. statistics keeps only the three counters used for
+    the availability check, and season_versions one short token per season
+    for episode index invalidation.
+
+    host is not an API field: it records which instance the series lives
+    on, so follow-up calls go to the same one.
+    """
+
+    __slots__ = (
+        "id",
+        "tmdb_id",
+        "tvdb_id",
+        "title",
+        "monitored",
+        "statistics",
+        "season_versions",
+        "host",
+    )
+    FIELDS = {
+        "id": "id",
+        "tmdb_id": "tmdbId",
+        "tvdb_id": "tvdbId",
+        "title": "title",
+        "monitored": "monitored",
+        "statistics": "statistics",
+        "season_versions": "seasonVersions",
+        "host": "host",
+    }
+
+    @classmethod
+    def from_api(cls, data):
+        stats = data.get("statistics") or {}
+        versions = data.get("seasonVersions")
+        if versions is None:
+            versions = {
+                str(season["seasonNumber"]): _version(season.get("statistics"))
+                for season in data.get("seasons") or []
+                if season.get("statistics")
+            }
+        return cls(
+            id=data.get("id"),
+            tmdb_id=data.get("tmdbId"),
+            tvdb_id=data.get("tvdbId"),
+            title=data.get("title"),
+            monitored=data.get("monitored"),
+            statistics={
+                "episodeFileCount": stats.get("episodeFileCount", 0),
+                "episodeCount": stats.get("episodeCount", 0),
+                "percentOfEpisodes": stats.get("percentOfEpisodes", 0),
+            },
+            season_versions=versions,
+            host=data.get("host"),
+        )
+
+    def season_version(self, season_number):
+        """
+        Token that changes whenever Sonarr's statistics for the season
+        change, falling back to the series totals when per-season
+        statistics are not known.
+        """
+        version = (self.season_versions or {}).get(str(season_number))
+        if version is None:
+            version = _version(self.statistics)
+        return version
+
+
+class QueueItem(Record):
+    """
+    One entry of a Radarr/Sonarr download queue, flattened for listing.
+    progress is a percentage and eta the seconds left, or None if unknown.
+    """
+
+    __slots__ = (
+        "id",
+        "kind",
+        "instance",
+        "title",
+        "status",
+        "progress",
+        "size",
+        "eta",
+        "error",
+        "poster",
+        "fanart",
+    )
+    FIELDS = {attr: attr for attr in __slots__}
+
+    @classmethod
+    def from_queue(cls, data, kind, instance):
+        """
+        Project a /api/v3/queue record requested with includeMovie, or with
+        includeSeries and includeEpisode.
+        """
+        if kind == "movie":
+            media = data.get("movie") or {}
+            title = media.get("title") or data.get("title")
+            if media.get("year"):
+                title = f"{title} ({media['year']})"
+        else:
+            media = data.get("series") or {}
+            episode = data.get("episode") or {}
+            title = media.get("title") or data.get("title")
+            if episode:
+                title = (
+                    f"{title} S{episode.get('seasonNumber', 0):02d}"
+                    f"E{episode.get('episodeNumber', 0):02d}"
+                )
+                if episode.get("title"):
+                    title = f"{title} - {episode['title']}"
+
+        size = data.get("size") or 0
+        size_left = data.get("sizeleft") or 0
+        messages = [
+            m for status in data.get("statusMessages") or [] for m in status.get("messages") or []
+        ]
+        return cls(
+            id=data.get("id"),
+            kind=kind,
+            instance=instance,
+            title=title,
+            status=data.get("trackedDownloadState") or data.get("status"),
+            progress=round(100.0 * (size - size_left) / size, 1) if size else 0.0,
+            size=size,
+            eta=_seconds(data.get("timeleft")),
+            error=data.get("errorMessage") or (messages[0] if messages else None),
+            poster=_image(media, "poster"),
+            fanart=_image(media, "fanart"),
+        )
+
+
+def _seconds(timeleft):
+    """
+    Parse a .NET TimeSpan ("hh:mm:ss" or "d.hh:mm:ss") into seconds.
+    """
+    if not timeleft:
+        return None
+    try:
+        hours, minutes, seconds = timeleft.split(":")
+        days, _, hours = hours.rpartition(".")
+        return int(days or 0) * 86400 + int(hours) * 3600 + int(minutes) * 60 + int(float(seconds))
+    except ValueError:
+        return None
+
+
+def _image(media, cover_type):
+    for image in media.get("images") or []:
+        if image.get("coverType") == cover_type:
+            return image.get("remoteUrl") or image.get("url")
+    return None
+
+
+def _version(stats):
+    stats = stats or {}
+    return "|".join(str(stats.get(k)) for k in SEASON_VERSION_FIELDS)
+
+
+def encode(obj):
+    """
+    json.dumps default= hook for records.
+    """
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# --------------------------------------------------------------------------
+# Streaming JSON
+# --------------------------------------------------------------------------
+def iter_array(response, chunk_size=64 * 1024):
+    """
+    Yield the items of a JSON array response one at a time, decoding it
+    chunk by chunk, so a large listing is never held in memory in full.
+    The response must have been requested with stream=True.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0
+    started = False
+
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        buf = buf[pos:] + text.decode(chunk)
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf):
+                break
+            if not started:
+                if buf[pos] != "[":
+                    raise ValueError("Expected a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                # Item continues in the next chunk
+                break
+            if not isinstance(item, (dict, list)):
+                # A number cut by a chunk boundary decodes early ("12" of
+                # "12345", "-1" of "-1.5e3"), so scalars are only taken
+                # once the separator after them has arrived
+                after = end
+                while after < len(buf) and buf[after] in " \t\r\n":
+                    after += 1
+                if after == len(buf) or buf[after] not in ",]":
+                    break
+            pos = end
+            yield item
+
+    raise ValueError("Truncated JSON array")
+
+
+def first_item(response):
+    """
+    Decode only the first item of a JSON array response, or None if it is
+    empty. The rest of the body is read and discarded without being parsed
+    so the connection can go back to the pool.
+    """
+    items = iter_array(response)
+    try:
+        item = next(items, None)
+    finally:
+        items.close()
+    for _ in response.iter_content(chunk_size=64 * 1024):
+        pass
+    return item
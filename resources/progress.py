@@ -0,0 +1,200 @@
+import os
+import random
+import threading
+import time
+
+import xbmc
+import xbmcgui
+from utils import ADDON_NAME, format_duration, log
+
+# Seconds between status checks of one title. Transfers are followed closely;
+# a title no release has been grabbed for yet is checked less and less often,
+# since that only changes when an indexer (or a webhook) has news.
+DOWNLOADING_INTERVAL = 5
+QUEUED_INTERVAL = 20
+WAITING_INTERVAL = 30
+MAX_INTERVAL = 5 * 60
+# Intervals are spread by this fraction so Kodi clients watching the same
+# servers do not poll in lockstep.
+JITTER = 0.2
+# How often playback is checked, in seconds.
+PLAYBACK_INTERVAL = 1
+# A placeholder takes a moment to start after the play request resolves;
+# watches are not ended for lack of playback before this many seconds.
+START_GRACE = 15
+PLACEHOLDER_PREFIX = "downloading"
+TMDB_HELPER_PLAY = "plugin://plugin.video.themoviedb.helper/?info=play&tmdb_type={type}&tmdb_id={tmdb_id}"
+
+
+class _Watch:
+    def __init__(self, params, title):
+        self.params = params
+        self.title = title
+        self.started = time.time()
+        self.next_poll = 0
+        self.interval = WAITING_INTERVAL
+        self.dialog = None
+
+    def show(self, status):
+        message = status["state"].capitalize()
+        if status["state"] in ("downloading", "queued"):
+            message = f"{message} {status['progress']:.0f}%"
+            if status.get("eta"):
+                message += f", {format_duration(status['eta'])} left"
+        if status.get("message"):
+            message = f"{message} - {status['message']}"
+        if self.dialog is None:
+            self.dialog = xbmcgui.DialogProgressBG()
+            self.dialog.create(self.title, message)
+        self.dialog.update(int(status.get("progress") or 0), self.title, message)
+
+    def close(self):
+        if self.dialog is not None:
+            self.dialog.close()
+            self.dialog = None
+
+
+class ProgressPoller:
+    """
+    Download progress for titles whose placeholder is playing.
+
+    All watched titles share one thread, which asks the owning instance about
+    each title on its own adaptive schedule and ends a watch when the
+    placeholder stops playing. poke() makes every watch check right away,
+    e.g. after a webhook said something changed. When a file lands the user
+    is offered to play it through TMDb Helper.
+    """
+
+    def __init__(self, borrow_client):
+        self._borrow_client = borrow_client
+        self._watches = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._stopped = False
+
+    def watch(self, params, title=""):
+        """
+        Follow a title requested with request_movie/request_series params.
+        """
+        key = _watch_key(params)
+        with self._lock:
+            if self._stopped:
+                return False
+            existing = self._watches.get(key)
+            if existing is not None:
+                existing.started = time.time()
+            else:
+                self._watches[key] = _Watch(params, title or ADDON_NAME)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return True
+
+    def poke(self):
+        with self._lock:
+            for watch in self._watches.values():
+                watch.next_poll = 0
+        self._wake.set()
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            thread = self._thread
+        self._wake.set()
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _run(self):
+        player = xbmc.Player()
+        while True:
+            with self._lock:
+                if self._stopped or not self._watches:
+                    watches = list(self._watches.values())
+                    self._watches.clear()
+                    self._thread = None
+                    break
+                watches = list(self._watches.items())
+
+            now = time.time()
+            playing = _placeholder_playing(player)
+            for key, watch in watches:
+                if not playing and now - watch.started > START_GRACE:
+                    self._end(key)
+                elif now >= watch.next_poll:
+                    self._poll(key, watch)
+
+            self._wake.wait(PLAYBACK_INTERVAL)
+            self._wake.clear()
+
+        for watch in watches:
+            watch.close()
+
+    def _poll(self, key, watch):
+        try:
+            with self._borrow_client() as client:
+                status = client.get_download_status(**watch.params)
+        except Exception as e:
+            log(f"Error checking download status: {e}", xbmc.LOGWARNING)
+            watch.next_poll = time.time() + _spread(watch.interval)
+            watch.interval = min(watch.interval * 2, MAX_INTERVAL)
+            return
+
+        state = status["state"]
+        if status.get("title"):
+            watch.title = status["title"]
+        if state == "missing":
+            log(f"No longer tracking {watch.title}: not found", xbmc.LOGDEBUG)
+            self._end(key)
+            return
+        if state == "available":
+            self._end(key)
+            threading.Thread(target=_offer_play, args=(watch,), daemon=True).start()
+            return
+
+        watch.show(status)
+        if state == "downloading":
+            watch.interval = DOWNLOADING_INTERVAL
+        elif state == "queued":
+            watch.interval = QUEUED_INTERVAL
+        else:
+            watch.interval = min(max(watch.interval * 2, WAITING_INTERVAL), MAX_INTERVAL)
+        watch.next_poll = time.time() + _spread(watch.interval)
+
+    def _end(self, key):
+        with self._lock:
+            watch = self._watches.pop(key, None)
+        if watch is not None:
+            watch.close()
+
+
+def _watch_key(params):
+    return f"{params.get('tmdb_id')}:{params.get('season')}:{params.get('episode')}"
+
+
+def _spread(interval):
+    return interval * random.uniform(1 - JITTER, 1 + JITTER)
+
+
+def _placeholder_playing(player):
+    try:
+        if not player.isPlayingVideo():
+            return False
+        return os.path.basename(player.getPlayingFile()).startswith(PLACEHOLDER_PREFIX)
+    except Exception:
+        # getPlayingFile raises when playback stopped in between
+        return False
+
+
+def _offer_play(watch):
+    if not xbmcgui.Dialog().yesno(watch.title, "Download finished. Play it now?"):
+        return
+    params = watch.params
+    url = TMDB_HELPER_PLAY.format(
+        type="movie" if params.get("season") is None else "tv", tmdb_id=params["tmdb_id"]
+    )
+    if params.get("season") is not None:
+        url += f"&season={params['season']}&episode={params['episode']}"
+    log(f"Playing finished download: {url}", xbmc.LOGINFO)
+    xbmc.executebuiltin(f"PlayMedia({url})")
@@ -0,0 +1,297 @@
+import os
+import sys
+import threading
+from contextlib import contextmanager
+
+import xbmc
+import xbmcaddon
+import xbmcgui
+
+# Manually add resources to python path to ensure imports work
+addon = xbmcaddon.Addon()
+addon_dir = addon.getAddonInfo("path")
+sys.path.insert(0, os.path.join(addon_dir, "resources"))
+
+import stats
+from ipc import IPCServer
+from journal import drain, notify_result, queue_search
+from progress import ProgressPoller
+from webhook import DEFAULT_PORT, WebhookServer
+from utils import (
+    log,
+    notify,
+    install_player,
+    build_client,
+    get_journal,
+    get_kodi_library,
+    prefetch_episodes,
+    profile_path,
+)
+
+# How often the service wakes up for housekeeping, in seconds.
+TICK = 30
+
+# Kodi library notifications after which the Kodi library index is rebuilt.
+LIBRARY_EVENTS = ("VideoLibrary.OnScanFinished", "VideoLibrary.OnCleanFinished")
+
+# MediaClient methods that may add a series with targeted search, whose
+# results can ask for searches to be journaled.
+SERIES_METHODS = ("request_series", "request_season", "request_episodes")
+
+# MediaClient methods plugin invocations may call over IPC.
+CLIENT_METHODS = {
+    "request_movie",
+    "request_series",
+    "request_movies",
+    "request_season",
+    "request_episodes",
+    "get_queue_page",
+}
+
+
+class HelparrService(xbmc.Monitor):
+    """
+    Background service keeping a warm MediaClient (connection pools, caches,
+    library index) alive between plays. Plugin invocations hand their work
+    to it over the IPC channel and fall back to doing it themselves when the
+    service is not running.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.configure_stats()
+        self._lock = threading.Lock()
+        self._client = build_client()
+        # Calls in progress per client, so reload() never closes a client
+        # another thread is still using
+        self._users = {}
+        self._journal = get_journal()
+        self._draining = threading.Lock()
+        self._ticking = threading.Lock()
+        self._server = IPCServer(self.dispatch)
+        self._webhook = None
+        self._webhook_config = None
+        self._progress = ProgressPoller(self.borrow_client)
+        self._indexing = threading.Lock()
+        self._index_pending = False
+
+    @contextmanager
+    def borrow_client(self):
+        """
+        Use the current client for one call. A client replaced by reload()
+        in the meantime is closed when its last user is done with it.
+        """
+        with self._lock:
+            client = self._client
+            self._users[client] = self._users.get(client, 0) + 1
+        try:
+            yield client
+        finally:
+            with self._lock:
+                self._users[client] -= 1
+                retired = not self._users[client] and client is not self._client
+                if not self._users[client]:
+                    del self._users[client]
+            if retired:
+                client.close()
+
+    def onSettingsChanged(self):
+        log("Settings changed, rebuilding client.", xbmc.LOGDEBUG)
+        self.configure_stats()
+        self.reload()
+        self.configure_webhook()
+        self.start_kodi_library(only_missing=True)
+
+    def onNotification(self, sender, method, data):
+        if method in LIBRARY_EVENTS:
+            self.start_kodi_library()
+
+    def start_kodi_library(self, only_missing=False):
+        threading.Thread(target=self.rebuild_kodi_library, args=(only_missing,), daemon=True).start()
+
+    def rebuild_kodi_library(self, only_missing=False):
+        """
+        Rebuild the Kodi library index if enabled. With only_missing, an
+        index that was built before is left alone. A rebuild requested
+        while one is running is done right after it.
+        """
+        library = get_kodi_library()
+        if library is None:
+            return
+        try:
+            if only_missing and library.built_at():
+                return
+            self._index_pending = True
+            # Re-checked after releasing, for requests made in between
+            while self._index_pending and self._indexing.acquire(blocking=False):
+                try:
+                    while self._index_pending:
+                        self._index_pending = False
+                        library.rebuild()
+                finally:
+                    self._indexing.release()
+        except Exception as e:
+            log(f"Error indexing Kodi library: {e}", xbmc.LOGERROR)
+        finally:
+            library.close()
+
+    def configure_webhook(self):
+        """
+        Start, stop or restart the webhook receiver to match the settings.
+        """
+        settings = xbmcaddon.Addon()
+        config = None
+        if settings.getSettingBool("webhook"):
+            config = (
+                settings.getSettingInt("webhook_port") or DEFAULT_PORT,
+                settings.getSetting("webhook_password"),
+            )
+        if config == self._webhook_config:
+            return
+        if self._webhook is not None:
+            self._webhook.stop()
+            self._webhook = None
+        self._webhook_config = config
+        if config is None:
+            return
+        if not config[1]:
+            log("Webhook receiver not started: no password set.", xbmc.LOGWARNING)
+            notify("Set a webhook password to receive webhooks", icon=xbmcgui.NOTIFICATION_WARNING)
+            return
+        try:
+            self._webhook = WebhookServer(self.on_webhook, *config)
+            self._webhook.start()
+        except Exception as e:
+            log(f"Error starting webhook receiver: {e}", xbmc.LOGERROR)
+            notify(f"Webhook port {config[0]} is not available", icon=xbmcgui.NOTIFICATION_ERROR)
+
+    def on_webhook(self, event):
+        event_type = event.get("eventType")
+        with self.borrow_client() as client:
+            label = client.apply_event(event)
+        log(f"Webhook {event_type}: {label}", xbmc.LOGDEBUG)
+        if event_type in ("Grab", "Download"):
+            self._progress.poke()
+
+        settings = xbmcaddon.Addon()
+        if event_type == "Test":
+            notify("Webhook received", icon=settings.getAddonInfo("icon"), time=3000)
+        elif (
+            event_type == "Download"
+            and not event.get("isUpgrade")
+            and label
+            and settings.getSettingBool("webhook_notify")
+        ):
+            notify("Download finished", header=label, icon=settings.getAddonInfo("icon"))
+
+    def configure_stats(self):
+        stats.flush()
+        stats.configure(
+            xbmcaddon.Addon().getSettingBool("diagnostics"), profile_path("stats.json")
+        )
+
+    def reload(self):
+        with self._lock:
+            old, self._client = self._client, build_client()
+            # Otherwise closed by borrow_client() once its calls finish
+            idle = old not in self._users
+        if idle:
+            old.close()
+
+    def dispatch(self, method, params):
+        if method == "ping":
+            return "pong"
+        if method == "reload":
+            self.reload()
+            return True
+        if method == "drain":
+            threading.Thread(target=self.drain_journal, daemon=True).start()
+            return True
+        if method == "rebuild_kodi_library":
+            self.start_kodi_library()
+            return True
+        if method == "watch_progress":
+            return self._progress.watch(params["params"], params.get("title"))
+        if method not in CLIENT_METHODS:
+            raise Exception(f"Unknown method: {method}")
+        with self.borrow_client() as client:
+            result = getattr(client, method)(**params)
+        if method in SERIES_METHODS and queue_search(self._journal, result, params):
+            # The series was just added: search for the episode once Sonarr
+            # has its episode list, and for the rest of it later
+            threading.Thread(target=self.drain_journal, daemon=True).start()
+        if method == "request_series" and params.get("episode") is not None:
+            # Warm the next episodes once the answer is on its way
+            threading.Thread(
+                target=self.prefetch_episodes,
+                args=(params["tmdb_id"], params["season"], params["episode"]),
+                daemon=True,
+            ).start()
+        return result
+
+    def prefetch_episodes(self, tmdb_id, season, episode):
+        with self.borrow_client() as client:
+            prefetch_episodes(client, tmdb_id, season, episode)
+
+    def drain_journal(self):
+        """
+        Submit queued requests. Only one drain runs at a time; a drain that
+        is already running picks up newly queued entries as it goes.
+        """
+        if not self._draining.acquire(blocking=False):
+            return
+        try:
+            with self.borrow_client() as client:
+                drain(self._journal, client, on_result=notify_result)
+        except Exception as e:
+            log(f"Error submitting queued requests: {e}", xbmc.LOGERROR)
+        finally:
+            self._draining.release()
+
+    def start_tick(self):
+        # Drains and library pulls can take minutes; the Monitor thread only
+        # waits for abort, so Kodi can shut the service down at any time
+        threading.Thread(target=self.tick, daemon=True).start()
+
+    def tick(self):
+        """
+        Housekeeping. A tick still running when the next one is due is not
+        doubled up.
+        """
+        if not self._ticking.acquire(blocking=False):
+            return
+        try:
+            self.drain_journal()
+            settings = xbmcaddon.Addon()
+            with self.borrow_client() as client:
+                client.refresh_library(max_age=settings.getSettingInt("library_refresh") * 60)
+            stats.flush()
+        except Exception as e:
+            log(f"Error in housekeeping: {e}", xbmc.LOGERROR)
+        finally:
+            self._ticking.release()
+
+    def run(self):
+        install_player()
+        self._server.start()
+        self.configure_webhook()
+        # The library may have changed while Kodi was not running
+        self.start_kodi_library()
+        log("Service started.")
+        try:
+            self.start_tick()
+            while not self.waitForAbort(TICK):
+                self.start_tick()
+        finally:
+            self._server.stop()
+            self._progress.stop()
+            if self._webhook is not None:
+                self._webhook.stop()
+            self._client.close()
+            self._journal.close()
+            stats.flush()
+            log("Service stopped.")
+
+
+if __name__ == "__main__":
+    HelparrService().run()
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import time
+
+import xbmc
+import models
+from utils import log
+
+# Finished results are reused by identical requests for this many seconds.
+MEMO_TTL = 5
+POLL_INTERVAL = 0.05
+# A flight whose owner has not finished after this long is presumed dead and
+# taken over.
+DEFAULT_LEASE = 60
+# Result files older than this are swept when a new one is written.
+SWEEP_AGE = 10 * 60
+
+
+class SingleFlight:
+    """
+    Cross-process de-duplication of identical requests.
+
+    TMDb Helper can launch the player several times in quick succession
+    (double presses, autoplay-next, retries), each in its own interpreter.
+    The first invocation for a key creates "<key>.lock" with O_EXCL and runs
+    the request; concurrent ones wait for it and reuse the result it leaves
+    in "<key>.json", which later ones also reuse for MEMO_TTL seconds.
+    Lock files work the same on every platform Kodi runs on.
+    """
+
+    def __init__(self, folder, memo_ttl=MEMO_TTL, lease=DEFAULT_LEASE):
+        if not os.path.isdir(folder):
+            os.makedirs(folder, exist_ok=True)
+        self._folder = folder
+        self._memo_ttl = memo_ttl
+        self._lease = lease
+
+    def _paths(self, key):
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        base = os.path.join(self._folder, name)
+        return base + ".lock", base + ".json"
+
+    def do(self, key, fn):
+        """
+        Return fn()'s result, or the result of an identical call that is in
+        flight or finished less than memo_ttl seconds ago.
+        Exceptions raised by fn are not shared; waiters then run fn
+        themselves.
+        """
+        lock_path, result_path = self._paths(key)
+        deadline = time.time() + self._lease
+
+        while True:
+            result = self._read(result_path)
+            if result is not None:
+                log(f"Reusing result of {key}", xbmc.LOGDEBUG)
+                return result
+            if self._acquire(lock_path):
+                break
+            if time.time() > deadline:
+                log(f"Gave up waiting for {key}", xbmc.LOGWARNING)
+                return fn()
+            time.sleep(POLL_INTERVAL)
+
+        try:
+            # Another process may have finished between our last check and
+            # taking the lock
+            result = self._read(result_path)
+            if result is not None:
+                return result
+            result = fn()
+            self._write(result_path, result)
+            return result
+        finally:
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+
+    def _acquire(self, lock_path):
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > self._lease:
+                    log("Taking over a stale request lock", xbmc.LOGWARNING)
+                    os.remove(lock_path)
+            except OSError:
+                pass
+            return False
+        except OSError as e:
+            # Unusable folder: run without de-duplication
+            log(f"Error creating request lock: {e}", xbmc.LOGERROR)
+            return True
+        os.write(fd, str(os.getpid()).encode("ascii"))
+        os.close(fd)
+        return True
+
+    def _read(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("t", 0) > self._memo_ttl:
+            return None
+        return entry.get("v")
+
+    def _write(self, path, result):
+        try:
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"t": time.time(), "v": result}, f, default=models.encode)
+            os.replace(tmp, path)
+        except Exception as e:
+            log(f"Error writing request result: {e}", xbmc.LOGERROR)
+        self._sweep()
+
+    def _sweep(self):
+        now = time.time()
+        try:
+            for name in os.listdir(self._folder):
+                path = os.path.join(self._folder, name)
+                if now - os.path.getmtime(path) > SWEEP_AGE:
+                    os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,176 @@
+import json
+import os
+import threading
+import time
+
+import xbmc
+from utils import log
+
+# Latency histogram bucket upper bounds, in milliseconds.
+BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Days of aggregates kept in the rolling store.
+KEEP_DAYS = 7
+
+_lock = threading.Lock()
+_enabled = False
+_path = None
+_timings = {}
+_counters = {}
+
+
+def configure(enabled, path=None):
+    """
+    Turn collection on or off. While disabled every call below returns
+    immediately, so instrumented code pays close to nothing.
+    """
+    global _enabled, _path
+    _enabled = bool(enabled and path)
+    _path = path
+
+
+def enabled():
+    return _enabled
+
+
+def record(name, seconds, error=False):
+    if not _enabled:
+        return
+    ms = seconds * 1000
+    with _lock:
+        entry = _timings.get(name)
+        if entry is None:
+            entry = _timings[name] = _empty_timing()
+        _add_timing(entry, ms, error)
+
+
+def incr(name, n=1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def _empty_timing():
+    return {"count": 0, "errors": 0, "total": 0.0, "max": 0.0, "buckets": [0] * (len(BUCKETS) + 1)}
+
+
+def _add_timing(entry, ms, error):
+    entry["count"] += 1
+    entry["errors"] += int(error)
+    entry["total"] += ms
+    entry["max"] = max(entry["max"], ms)
+    for i, bound in enumerate(BUCKETS):
+        if ms <= bound:
+            entry["buckets"][i] += 1
+            break
+    else:
+        entry["buckets"][-1] += 1
+
+
+def _merge_timing(into, other):
+    into["count"] += other["count"]
+    into["errors"] += other["errors"]
+    into["total"] += other["total"]
+    into["max"] = max(into["max"], other["max"])
+    into["buckets"] = [a + b for a, b in zip(into["buckets"], other["buckets"])]
+
+
+# --------------------------------------------------------------------------
+# Rolling store
+# --------------------------------------------------------------------------
+def _load(path):
+    if not path or not os.path.exists(path):
+        return {"days": {}}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        log(f"Discarding unreadable stats {path}: {e}", xbmc.LOGWARNING)
+        return {"days": {}}
+
+
+def flush():
+    """
+    Merge everything collected in this process into today's aggregate in
+    the store, and drop days that fell out of the window.
+    """
+    if not _enabled:
+        return
+    with _lock:
+        timings, counters = dict(_timings), dict(_counters)
+        _timings.clear()
+        _counters.clear()
+    if not timings and not counters:
+        return
+
+    store = _load(_path)
+    today = time.strftime("%Y-%m-%d")
+    day = store["days"].setdefault(today, {"timings": {}, "counters": {}})
+    for name, entry in timings.items():
+        if name in day["timings"]:
+            _merge_timing(day["timings"][name], entry)
+        else:
+            day["timings"][name] = entry
+    for name, n in counters.items():
+        day["counters"][name] = day["counters"].get(name, 0) + n
+    for old in sorted(store["days"])[:-KEEP_DAYS]:
+        del store["days"][old]
+
+    tmp_path = f"{_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(_path), exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(store, f, separators=(",", ":"))
+        os.replace(tmp_path, _path)
+    except Exception as e:
+        log(f"Error writing stats: {e}", xbmc.LOGERROR)
+
+
+def summary(path=None):
+    """
+    Aggregate the whole rolling window:
+    {"since": day, "timings": {name: {..., "avg", "p50", "p95"}}, "counters": {...}}
+    """
+    store = _load(path or _path)
+    timings = {}
+    counters = {}
+    for day in store["days"].values():
+        for name, entry in day["timings"].items():
+            if name in timings:
+                _merge_timing(timings[name], entry)
+            else:
+                timings[name] = dict(entry, buckets=list(entry["buckets"]))
+        for name, n in day["counters"].items():
+            counters[name] = counters.get(name, 0) + n
+
+    for entry in timings.values():
+        entry["avg"] = entry["total"] / entry["count"] if entry["count"] else 0.0
+        entry["p50"] = _percentile(entry, 0.50)
+        entry["p95"] = _percentile(entry, 0.95)
+    return {
+        "since": min(store["days"]) if store["days"] else None,
+        "timings": timings,
+        "counters": counters,
+    }
+
+
+def _percentile(entry, q):
+    """
+    Upper bound of the histogram bucket holding the q-th quantile.
+    """
+    wanted = q * entry["count"]
+    seen = 0
+    for i, n in enumerate(entry["buckets"]):
+        seen += n
+        if n and seen >= wanted:
+            return BUCKETS[i] if i < len(BUCKETS) else entry["max"]
+    return 0.0
+
+
+def reset(path=None):
+    path = path or _path
+    with _lock:
+        _timings.clear()
+        _counters.clear()
+    if path and os.path.exists(path):
+        os.remove(path)
@@ -1,4 +1,6 @@
+import hashlib
 import os
+import time
 
 import xbmc
 import xbmcaddon
@@ -8,33 +10,296 @@ import xbmcvfs
 
 ADDON_NAME = "TMDb Download Helparr"
 PLAYER_FILENAME = "helparr.json"
+# Written to addon_data once a player file is installed. Named after the
+# source file's size and mtime, so later invocations can skip the check
+# with a few stats and a changed player is installed even without a
+# version bump.
+PLAYER_STAMP = "player-{source}.stamp"
+# Radarr/Sonarr instances configurable per backend, the first being the
+# primary one
+MAX_INSTANCES = 3
+# Caches are single JSON files parsed on every access, so the ones that grow
+# with every title played keep only the most recent entries.
+LOOKUP_CACHE_ENTRIES = 100
+EPISODE_CACHE_ENTRIES = 50
+# Sequential backend steps of one request workflow (existence check, add
+# fan-out, add), each bounded by the client's fan-out timeout.
+WORKFLOW_STEPS = 3
+# Slack for local work (caches, IPC, JSON) on top of the network bound.
+WORKFLOW_SLACK = 5
 
 
 def log(msg, level=xbmc.LOGINFO):
     xbmc.log(f"[{ADDON_NAME}] {msg}", level)
 
 
+def profile_path(*parts):
+    """
+    Return a path inside this addon's addon_data directory.
+    """
+    addon = xbmcaddon.Addon()
+    profile = xbmcvfs.translatePath(addon.getAddonInfo("profile"))
+    return os.path.join(profile, *parts)
+
+
+def settings_signature(*values):
+    """
+    Hash the settings that affect cached backend data, so caches can be
+    invalidated when they change.
+    """
+    return hashlib.sha1("|".join(values).encode("utf-8")).hexdigest()
+
+
+def get_cache(name="metadata", max_entries=None, ttl=None):
+    """
+    Open an on-disk cache, dropping it if the backend settings changed since
+    it was written. Entries expire after ttl seconds, by default the
+    cache_ttl setting.
+    """
+    from cache import DiskCache
+
+    addon = xbmcaddon.Addon()
+    if ttl is None:
+        ttl = (addon.getSettingInt("cache_ttl") or 24) * 60 * 60
+    cache = DiskCache(profile_path("cache", f"{name}.json"), ttl=ttl, max_entries=max_entries)
+    cache.validate(backend_signature())
+    return cache
+
+
+def get_library():
+    """
+    Open the local Radarr/Sonarr library index, or None if it is disabled.
+    """
+    addon = xbmcaddon.Addon()
+    if not addon.getSettingBool("library_index"):
+        return None
+    from library import LibraryIndex
+
+    try:
+        library = LibraryIndex(profile_path("library.db"))
+        library.validate(backend_signature())
+        return library
+    except Exception as e:
+        log(f"Error opening library index: {e}", xbmc.LOGERROR)
+        return None
+
+
+def get_kodi_library():
+    """
+    Open the index of Kodi's own video library, or None if it is disabled.
+    """
+    addon = xbmcaddon.Addon()
+    if not addon.getSettingBool("kodi_library"):
+        return None
+    from kodilibrary import KodiLibraryIndex
+
+    try:
+        return KodiLibraryIndex(profile_path("kodi_library.db"))
+    except Exception as e:
+        log(f"Error opening Kodi library index: {e}", xbmc.LOGERROR)
+        return None
+
+
+def get_journal():
+    """
+    Open the durable queue of requests waiting to be submitted.
+    """
+    from journal import Journal
+
+    return Journal(profile_path("journal.db"))
+
+
+def request_budget():
+    """
+    Worst-case seconds one request workflow can take when every backend
+    step times out on connect and read, for every retry. Anyone waiting on
+    a request someone else is running waits this long before giving up.
+    """
+    addon = xbmcaddon.Addon()
+    per_attempt = (addon.getSettingInt("connect_timeout") or 5) + (
+        addon.getSettingInt("timeout") or 10
+    )
+    per_step = per_attempt * (1 + addon.getSettingInt("retries"))
+    return WORKFLOW_STEPS * per_step + WORKFLOW_SLACK
+
+
+def get_single_flight():
+    """
+    Open the cross-process de-duplication of identical play requests.
+    """
+    from singleflight import SingleFlight
+
+    # Owners are presumed dead once a request could have timed out
+    return SingleFlight(profile_path("flights"), lease=request_budget())
+
+
+def backend_signature():
+    addon = xbmcaddon.Addon()
+    values = []
+    for kind in ("radarr", "sonarr"):
+        values += [addon.getSetting(f"{kind}_url"), addon.getSetting(f"{kind}_key")]
+        for prefix in secondary_instances(addon, kind):
+            values += [addon.getSetting(f"{prefix}_url"), addon.getSetting(f"{prefix}_key")]
+    return settings_signature(*values)
+
+
+def secondary_instances(addon, kind):
+    """
+    Setting prefixes ("radarr2", ...) of the enabled secondary instances of
+    "radarr" or "sonarr".
+    """
+    return [
+        f"{kind}{n}"
+        for n in range(2, MAX_INSTANCES + 1)
+        if addon.getSettingBool(f"{kind}{n}_enabled") and addon.getSetting(f"{kind}{n}_url")
+    ]
+
+
+def _route(addon, prefix):
+    from client import Route
+
+    return Route(
+        addon.getSetting(f"{prefix}_profile"),
+        addon.getSetting(f"{prefix}_genres"),
+        addon.getSetting(f"{prefix}_languages"),
+    )
+
+
+def build_client():
+    """
+    Build a MediaClient from the addon settings, wired to the on-disk caches.
+    """
+    from client import EPISODE_INDEX_TTL, ID_TTL, LOOKUP_TTL, PREFETCH_TTL, QUEUE_TTL, MediaClient
+
+    from cache import DiskCache
+
+    addon = xbmcaddon.Addon()
+    instances = {
+        kind: [
+            {
+                "name": addon.getSetting(f"{prefix}_name") or prefix.capitalize(),
+                "host": addon.getSetting(f"{prefix}_url"),
+                "apikey": addon.getSetting(f"{prefix}_key"),
+                "route": _route(addon, prefix),
+            }
+            for prefix in secondary_instances(addon, kind)
+        ]
+        for kind in ("radarr", "sonarr")
+    }
+    return MediaClient(
+        addon.getSetting("radarr_url"),
+        addon.getSetting("radarr_key"),
+        addon.getSetting("sonarr_url"),
+        addon.getSetting("sonarr_key"),
+        pool_size=addon.getSettingInt("pool_size") or 4,
+        timeout=(
+            addon.getSettingInt("connect_timeout") or 5,
+            addon.getSettingInt("timeout") or 10,
+        ),
+        cache=get_cache(),
+        episode_cache=get_cache(
+            "episodes", max_entries=EPISODE_CACHE_ENTRIES, ttl=EPISODE_INDEX_TTL
+        ),
+        library=get_library(),
+        retries=addon.getSettingInt("retries"),
+        breaker_store=DiskCache(profile_path("cache", "breaker.json"), ttl=0),
+        radarr_route=_route(addon, "radarr"),
+        sonarr_route=_route(addon, "sonarr"),
+        radarr_instances=instances["radarr"],
+        sonarr_instances=instances["sonarr"],
+        prefetch_cache=(
+            get_cache("prefetch", ttl=PREFETCH_TTL) if addon.getSettingBool("prefetch") else None
+        ),
+        queue_cache=get_cache("queue", ttl=QUEUE_TTL),
+        id_cache=get_cache("ids", ttl=ID_TTL),
+        lookup_cache=get_cache("lookup", max_entries=LOOKUP_CACHE_ENTRIES, ttl=LOOKUP_TTL),
+        targeted_search=addon.getSettingBool("targeted_search"),
+    )
+
+
+def prefetch_episodes(client, tmdb_id, season, episode):
+    """
+    Warm upcoming episodes after an episode request, if enabled.
+    """
+    addon = xbmcaddon.Addon()
+    if not addon.getSettingBool("prefetch"):
+        return
+    try:
+        client.prefetch_episodes(
+            int(tmdb_id),
+            int(season),
+            int(episode),
+            count=addon.getSettingInt("prefetch_episodes") or 3,
+            request=addon.getSettingBool("prefetch_request"),
+        )
+    except Exception as e:
+        log(f"Error prefetching episodes: {e}", xbmc.LOGERROR)
+
+
+class Timer:
+    """
+    Collect a per-stage wall time breakdown and write it to the log.
+    """
+
+    def __init__(self, started=None):
+        self._started = started if started is not None else time.perf_counter()
+        self._last = self._started
+        self._stages = []
+
+    @property
+    def stages(self):
+        return list(self._stages)
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self._stages.append((stage, now - self._last))
+        self._last = now
+
+    def log_summary(self, label, level=xbmc.LOGDEBUG):
+        total = self._last - self._started
+        stages = ", ".join(f"{name}={elapsed * 1000:.1f}ms" for name, elapsed in self._stages)
+        log(f"{label}: {stages}, total={total * 1000:.1f}ms", level)
+
+
+def format_duration(seconds):
+    """
+    Short "1h 05m" / "12m" form of a number of seconds.
+    """
+    hours, minutes = divmod(seconds // 60, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    return f"{minutes}m"
+
+
 def notify(message, header=ADDON_NAME, icon=xbmcgui.NOTIFICATION_INFO, time=5000):
     xbmcgui.Dialog().notification(header, message, icon, time)
 
 
 def install_player():
     addon = xbmcaddon.Addon()
-    addon_dir = addon.getAddonInfo("path")
 
+    addon_dir = addon.getAddonInfo("path")
+    source_path = os.path.join(addon_dir, "resources", "players", PLAYER_FILENAME)
     dest_folder = xbmcvfs.translatePath(
         "special://profile/addon_data/plugin.video.themoviedb.helper/players/"
     )
     dest_path = os.path.join(dest_folder, PLAYER_FILENAME)
 
-    # 2. Only now setup source path and read content
-    source_path = os.path.join(addon_dir, "resources", "players", PLAYER_FILENAME)
-
-    if not xbmcvfs.exists(source_path):
+    try:
+        st = os.stat(source_path)
+    except OSError:
         log(f"Source player file not found at: {source_path}", xbmc.LOGERROR)
         notify("Source player file not found", icon=xbmcgui.NOTIFICATION_ERROR)
         return
 
+    # 1. Fast path: this source file was already installed and TMDb Helper
+    # still has it
+    source_id = hashlib.sha1(f"{st.st_size}:{st.st_mtime_ns}".encode("ascii")).hexdigest()[:16]
+    stamp_path = profile_path(PLAYER_STAMP.format(source=source_id))
+    if os.path.exists(stamp_path) and os.path.exists(dest_path):
+        return
+
+    # 2. Only now read content
     try:
         with xbmcvfs.File(source_path) as f:
             source_content = f.read()
@@ -49,6 +314,7 @@ def install_player():
                 dest_content = f.read()
             if source_content == dest_content:
                 # Already up to date
+                _write_player_stamp(stamp_path, source_content)
                 return
         except Exception:
             pass
@@ -69,3 +335,23 @@ def install_player():
     except Exception as e:
         log(f"Install Error: {e}", xbmc.LOGERROR)
         notify(f"Install failed: {e}", icon=xbmcgui.NOTIFICATION_ERROR)
+        return
+
+    _write_player_stamp(stamp_path, source_content)
+
+
+def _write_player_stamp(stamp_path, content):
+    """
+    Record the content hash of the installed player and drop stamps left by
+    previous addon versions.
+    """
+    folder = os.path.dirname(stamp_path)
+    try:
+        os.makedirs(folder, exist_ok=True)
+        for name in os.listdir(folder):
+            if name.startswith("player-") and name.endswith(".stamp"):
+                os.remove(os.path.join(folder, name))
+        with open(stamp_path, "w", encoding="utf-8") as f:
+            f.write(hashlib.sha1(content.encode("utf-8")).hexdigest())
+    except Exception as e:
+        log(f"Error writing player stamp: {e}", xbmc.LOGWARNING)
@@ -0,0 +1,89 @@
+import base64
+import hmac
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+import xbmc
+from utils import log
+
+DEFAULT_PORT = 8788
+MAX_BODY = 1024 * 1024
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        if not self._authorized():
+            self._reply(401)
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY:
+                raise Exception(f"Payload too large ({length} bytes)")
+            event = json.loads(self.rfile.read(length))
+        except Exception as e:
+            log(f"Invalid webhook: {e}", xbmc.LOGWARNING)
+            self._reply(400)
+            return
+        # Answer first; Radarr/Sonarr do not care about the outcome
+        self._reply(200)
+        try:
+            self.server.on_event(event)
+        except Exception as e:
+            log(f"Error handling webhook: {e}", xbmc.LOGERROR)
+
+    def _authorized(self):
+        header = self.headers.get("Authorization") or ""
+        if not header.startswith("Basic "):
+            return False
+        try:
+            _, _, password = base64.b64decode(header[6:]).decode("utf-8").partition(":")
+        except Exception:
+            return False
+        # Bytes, as compare_digest refuses non-ASCII str
+        return hmac.compare_digest(password.encode("utf-8"), self.server.password)
+
+    def _reply(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class WebhookServer:
+    """
+    Receiver for Radarr/Sonarr "Webhook" connections.
+
+    on_event(event) is called on a worker thread with every decoded payload.
+    Requests must carry the password with HTTP basic auth (the webhook's
+    Username/Password fields; the username is ignored).
+    """
+
+    def __init__(self, on_event, port=DEFAULT_PORT, password=""):
+        # Listening on every interface lets anyone on the network send
+        # events, so there is no unauthenticated mode
+        if not password:
+            raise ValueError("A webhook password is required.")
+        # Radarr and Sonarr usually run on another machine
+        self._server = _Server(("0.0.0.0", port), _Handler)
+        self._server.on_event = on_event
+        self._server.password = password.encode("utf-8")
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        log(f"Webhook receiver listening on port {self._server.server_address[1]}", xbmc.LOGINFO)
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()